@@ -0,0 +1,365 @@
+"""
+Benchmark das etapas do pipeline de renderização.
+
+Cada etapa (`read_obj`, `parse_obj`, `sceneObject.transform`, `Camera.add_object`,
+`Camera.snapshot`, `Camera.rasterize` e `save_obj`) é executada sobre todos os objetos
+de "exemplos-3D/" e sobre malhas sintéticas de tamanho crescente. Para cada etapa são
+registrados o tempo (menor tempo entre as repetições, após uma execução de aquecimento),
+o pico de memória (medido com tracemalloc em uma execução separada, para não distorcer o
+tempo) e a vazão (vértices/s, triângulos/s e, na rasterização, pixels escritos/s).
+
+Utilização
+----------
+    python benchmark.py run --output baseline.json
+    python benchmark.py compare baseline.json --max-slowdown 0.2
+    python benchmark.py check
+
+O modo 'compare' executa novamente o benchmark com os mesmos parâmetros da referência
+(ou le um resultado já salvo com `--current`) e termina com código 1 caso alguma etapa
+fique mais lenta do que o permitido em relação à referência ou não apareça no
+resultado atual.
+
+O modo 'check' verifica que as otimizações da rasterização não alteram a imagem: no modo
+'filled' as imagens com e sem culling por oclusão devem ser idênticas (inclusive com
+superfícies coplanares, em que a cor depende da ordem de desenho).
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+
+from camera import Camera
+from objloader import parse_obj
+from sceneObject import sceneObject, read_obj, save_obj
+
+
+STAGES = ['read_obj', 'parse_obj', 'transform', 'add_object', 'snapshot', 'rasterize', 'save_obj']
+
+DEFAULT_MESHES = './exemplos-3D/*.obj'
+DEFAULT_SIZES = [1000, 10000, 50000]
+DEFAULT_RES = (800, 600)
+
+
+def synthetic_mesh(filepath, triangles) -> None:
+    """
+    Gera uma esfera (grade de latitude x longitude) com aproximadamente `triangles`
+    triângulos e salva em `filepath` no mesmo formato dos arquivos de exemplos-3D.
+    """
+
+    n = max(2, int(np.sqrt(triangles / 2)))
+
+    theta, phi = np.meshgrid(np.linspace(0, np.pi, n + 1), np.linspace(0, 2 * np.pi, n + 1), indexing = 'ij')
+    vertices = np.stack([np.sin(theta) * np.cos(phi),
+                         np.cos(theta),
+                         np.sin(theta) * np.sin(phi)], axis = -1).reshape(-1, 3)
+
+    # índices (base 1) dos quatro cantos de cada célula da grade
+    i, j = np.meshgrid(np.arange(n), np.arange(n), indexing = 'ij')
+    a = (i * (n + 1) + j).ravel() + 1
+    b, c, d = a + 1, a + n + 1, a + n + 2
+    faces = np.concatenate([np.stack([a, c, b], axis = 1), np.stack([b, c, d], axis = 1)])
+
+    with open(filepath, 'w') as obj_file:
+        obj_file.writelines(f'v {x} {y} {z}\n' for x, y, z in vertices)
+        obj_file.writelines(f'f {v1} {v2} {v3}\n' for v1, v2, v3 in faces)
+
+
+def fit_in_unit_cube(obj_info) -> list:
+    """
+    Sequencia de transformações que centraliza o objeto na origem e o coloca dentro de
+    um cubo de lado 1, de modo que qualquer malha caiba na imagem da camera padrão.
+    """
+
+    vertices = np.array(list(obj_info['v'].values()))
+    low, high = vertices.min(axis = 0), vertices.max(axis = 0)
+    center = (low + high) / 2
+    scale = 1 / max((high - low).max(), 1e-12)
+
+    return [
+        ('mov', -center[0], -center[1], -center[2]),
+        ('scl', scale, scale, scale)
+    ]
+
+
+def measure(func, setup, repeat) -> dict:
+    """
+    Mede o menor tempo de `func(*setup())` entre `repeat` execuções e o pico de memória
+    alocada em uma execução adicional. `setup` não entra na medição.
+
+    Uma primeira execução não é medida: nela são carregadas (ou compiladas) as funções
+    do numba, custo que não se repete nas chamadas seguintes.
+    """
+
+    func(*setup())
+
+    best = float('inf')
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+
+    args = setup()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'time': best, 'peak_memory': peak}
+
+
+def bench_mesh(filepath, repeat, res, workdir) -> dict:
+    """
+    Executa todas as etapas do pipeline sobre um mesmo arquivo .obj.
+    """
+
+    obj_info = read_obj(filepath)
+    n_vertices = len(obj_info['v'])
+    n_triangles = len(obj_info.get('f', []))
+
+    seq = fit_in_unit_cube(obj_info)
+    placed = sceneObject(obj_info = obj_info).transform(seq = list(seq))
+
+    def camera():
+        return Camera(pos = (2, 2, 2), look_at = (0, 0, 0))
+
+    def camera_with_object():
+        cam = camera()
+        cam.add_object(alias = 'obj', obj_info = placed)
+        return cam
+
+    def camera_with_snapshot():
+        cam = camera_with_object()
+        cam.snapshot(fov = 120, aspect_ratio = 0.5, near = 0, far = 9)
+        return cam
+
+    snapshot = lambda cam: cam.snapshot(fov = 120, aspect_ratio = 0.5, near = 0, far = 9)
+    image_path = os.path.join(workdir, 'imagem.png')
+
+    stages = {
+        'read_obj':   (read_obj, lambda: (filepath,)),
+        'parse_obj':  (parse_obj, lambda: (filepath,)),
+        'transform':  (lambda obj, s: obj.transform(seq = s), lambda: (sceneObject(obj_info = obj_info), list(seq))),
+        'add_object': (lambda cam, obj: cam.add_object(alias = 'obj', obj_info = obj), lambda: (camera(), placed)),
+        'snapshot':   (snapshot, lambda: (camera_with_object(),)),
+        'rasterize':  (lambda cam: cam.rasterize(res = res, filepath = image_path), lambda: (camera_with_snapshot(),)),
+        'save_obj':   (save_obj, lambda: (os.path.join(workdir, 'saida.obj'), placed)),
+    }
+
+    results = {}
+    for stage in STAGES:
+        func, setup = stages[stage]
+        result = measure(func, setup, repeat)
+
+        elapsed = max(result['time'], 1e-12)
+        result['vertices'] = n_vertices
+        result['triangles'] = n_triangles
+        result['throughput'] = {
+            'vertices/s': n_vertices / elapsed,
+            'triangles/s': n_triangles / elapsed,
+        }
+        if stage == 'rasterize':
+            # pixels efetivamente escritos pela rasterização (ver stats.py)
+            cam = camera_with_snapshot()
+            cam.rasterize(res = res)
+            result['throughput']['pixels/s'] = cam.get_stats().counters['pixels_written'] / elapsed
+
+        results[stage] = result
+
+    return results
+
+
+def run(meshes, sizes, repeat, res, verbose = True) -> dict:
+    """
+    Executa o benchmark completo e retorna o resultado no formato salvo em JSON.
+    """
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'meshes': meshes,
+            'sizes': list(sizes),
+            'repeat': repeat,
+            'res': list(res),
+        },
+        'results': {}
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+
+        targets = [(os.path.basename(path), path) for path in sorted(glob.glob(meshes))]
+
+        for size in sizes:
+            path = os.path.join(workdir, f'synthetic_{size}.obj')
+            synthetic_mesh(path, size)
+            targets.append((f'synthetic_{size}', path))
+
+        for name, path in targets:
+            for stage, result in bench_mesh(path, repeat, res, workdir).items():
+                report['results'][f'{name}/{stage}'] = result
+
+                if verbose:
+                    print(f'{name:<40} {stage:<12} {result["time"] * 1000:10.2f} ms '
+                          f'{result["peak_memory"] / 2**20:8.2f} MiB '
+                          f'{result["throughput"]["triangles/s"]:14.0f} tri/s')
+
+    return report
+
+
+def compare(baseline, current, max_slowdown) -> list:
+    """
+    Compara dois resultados e retorna as etapas que ficaram mais lentas do que
+    `max_slowdown` (fração, ex: 0.2 = 20%) em relação à referência. Etapas da referência
+    que não aparecem no resultado atual também são retornadas (com tempo atual None).
+    """
+
+    regressions = []
+
+    for key, reference in baseline['results'].items():
+        if key not in current['results']:
+            regressions.append((key, reference['time'], None, None))
+            continue
+
+        slowdown = current['results'][key]['time'] / max(reference['time'], 1e-12) - 1
+
+        if slowdown > max_slowdown:
+            regressions.append((key, reference['time'], current['results'][key]['time'], slowdown))
+
+    return regressions
+
+
+def quad(size, z = 0.0) -> dict:
+    """
+    Quadrado de lado `size` centrado na origem, no plano z = `z` (formato de read_obj).
+    """
+
+    h = size / 2
+    corners = [(-h, -h, z), (h, -h, z), (h, h, z), (-h, h, z)]
+
+    return {'v': {i: np.array(corner) for i, corner in enumerate(corners)}, 'f': [[1, 2, 3], [1, 3, 4]]}
+
+
+def check(meshes, res, verbose = True) -> list:
+    """
+    Renderiza cenas no modo 'filled' com e sem culling por oclusão e retorna as cenas em
+    que as imagens diferem, como lista de (nome da cena, quantidade de pixels diferentes).
+    """
+
+    cube = read_obj('./exemplos-3D/coarseTri.cube.obj')
+    floor = sceneObject(obj_info = cube).transform(seq = [('scl', 3, 0.2, 3)])
+
+    # dois quadrados coplanares, o menor adicionado primeiro (fica na frente do maior)
+    scenes = [('coplanar', [('pequeno', quad(1)), ('grande', quad(6))], (2, 2, 2))]
+
+    for path in sorted(glob.glob(meshes)):
+        obj_info = read_obj(path)
+        placed = sceneObject(obj_info = obj_info).transform(seq = fit_in_unit_cube(obj_info))
+
+        for pos in [(2, 2, 2), (2, -2, -2), (0.5, -3, 0.5)]:
+            scenes.append((f'{os.path.basename(path)} {pos}', [('obj', placed), ('chao', floor)], pos))
+
+    mismatches = []
+
+    for name, objs, pos in scenes:
+        images = []
+
+        for occlusion in (True, False):
+            cam = Camera(pos = pos, look_at = (0, 0, 0))
+            for alias, obj_info in objs:
+                cam.add_object(alias = alias, obj_info = obj_info)
+            cam.snapshot(fov = 120, aspect_ratio = 0.5, near = 0, far = 9)
+            cam.rasterize(res = res, mode = 'filled', occlusion = occlusion)
+            images.append(np.asarray(cam.get_image()))
+
+        different = int((images[0] != images[1]).any(axis = 2).sum())
+
+        if different:
+            mismatches.append((name, different))
+
+        if verbose:
+            print(f'{name:<48} {"OK" if not different else f"{different} pixels diferentes"}')
+
+    return mismatches
+
+
+def main(argv = None) -> int:
+
+    parser = argparse.ArgumentParser(description = 'Benchmark das etapas do pipeline de renderização.')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+
+    # no modo 'compare' os parâmetros não informados são os mesmos da referência
+    for command in ('run', 'compare'):
+        sub = subparsers.add_parser(command)
+        sub.add_argument('--meshes', help = f'padrão glob dos arquivos .obj (padrão: {DEFAULT_MESHES})')
+        sub.add_argument('--sizes', type = int, nargs = '*',
+                         help = f'quantidade de triângulos das malhas sintéticas (padrão: {DEFAULT_SIZES})')
+        sub.add_argument('--repeat', type = int, help = 'padrão: 3')
+        sub.add_argument('--res', type = int, nargs = 2, help = f'padrão: {DEFAULT_RES}')
+
+    subparsers.choices['run'].add_argument('--output', default = 'benchmark.json')
+
+    subparsers.choices['compare'].add_argument('baseline')
+    subparsers.choices['compare'].add_argument('--current', help = 'resultado já salvo (não executa o benchmark)')
+    subparsers.choices['compare'].add_argument('--max-slowdown', type = float, default = 0.2)
+    subparsers.choices['compare'].add_argument('--output', help = 'salva o resultado atual neste arquivo')
+
+    sub = subparsers.add_parser('check')
+    sub.add_argument('--meshes', default = DEFAULT_MESHES, help = 'padrão glob dos arquivos .obj')
+    sub.add_argument('--res', type = int, nargs = 2, default = DEFAULT_RES)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'check':
+        return 1 if check(args.meshes, tuple(args.res)) else 0
+
+    defaults = {'meshes': DEFAULT_MESHES, 'sizes': DEFAULT_SIZES, 'repeat': 3, 'res': DEFAULT_RES}
+
+    if args.command == 'run':
+        params = {name: value if getattr(args, name) is None else getattr(args, name)
+                  for name, value in defaults.items()}
+        report = run(params['meshes'], params['sizes'], params['repeat'], tuple(params['res']))
+        with open(args.output, 'w') as out:
+            json.dump(report, out, indent = 2)
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    if args.current is not None:
+        with open(args.current) as current_file:
+            current = json.load(current_file)
+    else:
+        meta = baseline.get('meta', {})
+        params = {name: getattr(args, name) if getattr(args, name) is not None else meta.get(name, value)
+                  for name, value in defaults.items()}
+        current = run(params['meshes'], params['sizes'], params['repeat'], tuple(params['res']))
+
+    if args.output is not None:
+        with open(args.output, 'w') as out:
+            json.dump(current, out, indent = 2)
+
+    regressions = compare(baseline, current, args.max_slowdown)
+
+    for key, before, after, slowdown in regressions:
+        if after is None:
+            print(f'AUSENTE {key}: etapa da referência não encontrada no resultado atual')
+        else:
+            print(f'REGRESSÃO {key}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms (+{slowdown:.0%})')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -70,7 +70,7 @@ class Camera:
             glTranslate(tx/20., ty/20., - zpos)
             glRotate(ry, 1, 0, 0)
             glRotate(rx, 0, 1, 0)
-            glCallList(self.obj.gl_list)
+            self.obj.render()
 
             pygame.display.flip()
 
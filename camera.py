@@ -18,12 +18,163 @@ import numpy as np
 
 from PIL import Image, ImageColor
 from numpy.linalg import norm
-from sceneObject import save_obj
+from occlusion import HiZBuffer
+from stats import RenderStats
+from sceneObject import save_obj, face_indices
 from transformations import Transformer
 
+# quantidade padrão de triângulos processados por vez na rasterização
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# quantidade padrão de triângulos em cada grupo testado pelo culling por oclusão
+DEFAULT_CLUSTER_SIZE = 256
+
+
+@numba.njit(cache = True)
+def _draw_line(color_buffer, x0, y0, x1, y1, color) -> int:
+    """
+    Desenha as linhas utilizando as coordenadas X e Y dos pontos passados utilizando
+    o algoritmo de Bresenham. Retorna a quantidade de pixels escritos.
+
+    Coordenadas negativas são contadas a partir do final da imagem (mesmo comportamento
+    de PIL.Image.putpixel); pixels fora da imagem são ignorados.
+    """
+
+    height, width = color_buffer.shape[0], color_buffer.shape[1]
+
+    dx = x1 - x0
+    dy = y1 - y0
+
+    d = 2 * dy - dx
+
+    inc_e = 2 * dy
+    inc_ne = 2 * (dy - dx)
+
+    x = x0
+    y = y0
+
+    written = 0
+
+    while True:
+
+        # evita que os pixels ficam se expelhando na cena
+        if not ((x < 0) and (y < 0)):
+            px = x + width if x < 0 else x
+            py = y + height if y < 0 else y
+
+            if 0 <= px < width and 0 <= py < height:
+                color_buffer[py, px, 0] = color[0]
+                color_buffer[py, px, 1] = color[1]
+                color_buffer[py, px, 2] = color[2]
+                written += 1
+
+        if x >= x1:
+            break
+
+        if d <= 0:
+            d = d + inc_e
+            x += 1
+
+        else:
+            d = d + inc_ne
+            x += 1
+            y += 1
+
+    return written
+
+
+@numba.njit(cache = True)
+def _draw_wireframe(color_buffer, screen, color) -> int:
+    """
+    Desenha as arestas dos triângulos `screen` (array (T, 3, 2) de coordenadas inteiras).
+    Retorna a quantidade de pixels escritos.
+    """
+
+    pixels = 0
+
+    for t in range(screen.shape[0]):
+        v1, v2, v3 = screen[t, 0], screen[t, 1], screen[t, 2]
+
+        pixels += _draw_line(color_buffer, v1[0], v1[1], v2[0], v2[1], color)
+        pixels += _draw_line(color_buffer, v1[0], v1[1], v3[0], v3[1], color)
+        pixels += _draw_line(color_buffer, v2[0], v1[1], v3[0], v2[1], color)
+
+    return pixels
+
+
+@numba.njit(cache = True)
+def _fill_triangles(color_buffer, depth_buffer, screen, color, write_color = True) -> int:
+    """
+    Preenche os triângulos `screen` (array (T, 3, 3) com x, y na imagem e a profundidade)
+    testando cada pixel contra o buffer de profundidade (menor profundidade = mais próximo).
+    Com `write_color` False apenas o buffer de profundidade é alterado.
+    Retorna a quantidade de pixels escritos.
+    """
+
+    height, width = depth_buffer.shape
+    pixels = 0
+
+    for t in range(screen.shape[0]):
+        x0, y0, z0 = screen[t, 0, 0], screen[t, 0, 1], screen[t, 0, 2]
+        x1, y1, z1 = screen[t, 1, 0], screen[t, 1, 1], screen[t, 1, 2]
+        x2, y2, z2 = screen[t, 2, 0], screen[t, 2, 1], screen[t, 2, 2]
+
+        area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+        if area == 0:
+            continue
+
+        xmin = max(int(np.floor(min(x0, x1, x2))), 0)
+        xmax = min(int(np.ceil(max(x0, x1, x2))), width - 1)
+        ymin = max(int(np.floor(min(y0, y1, y2))), 0)
+        ymax = min(int(np.ceil(max(y0, y1, y2))), height - 1)
+
+        for py in range(ymin, ymax + 1):
+            cy = py + 0.5
+            for px in range(xmin, xmax + 1):
+                cx = px + 0.5
+
+                # coordenadas baricêntricas (aceita as duas orientações do triângulo)
+                w0 = ((x1 - cx) * (y2 - cy) - (x2 - cx) * (y1 - cy)) / area
+                w1 = ((x2 - cx) * (y0 - cy) - (x0 - cx) * (y2 - cy)) / area
+                w2 = 1.0 - w0 - w1
+
+                if w0 < 0 or w1 < 0 or w2 < 0:
+                    continue
+
+                z = w0 * z0 + w1 * z1 + w2 * z2
+
+                if z < depth_buffer[py, px]:
+                    depth_buffer[py, px] = z
+                    if write_color:
+                        color_buffer[py, px, 0] = color[0]
+                        color_buffer[py, px, 1] = color[1]
+                        color_buffer[py, px, 2] = color[2]
+                    pixels += 1
+
+    return pixels
+
+
+def _visible(screen, width, height) -> np.ndarray:
+    """
+    Máscara dos triângulos (array (T, 3, 3)) que podem aparecer na imagem: descarta os
+    triângulos totalmente fora da imagem e os degenerados (área nula).
+    """
+
+    low = screen[:, :, :2].min(axis = 1)
+    high = screen[:, :, :2].max(axis = 1)
+
+    inside = (high[:, 0] >= 0) & (low[:, 0] < width) & (high[:, 1] >= 0) & (low[:, 1] < height)
+
+    edge1 = screen[:, 1, :2] - screen[:, 0, :2]
+    edge2 = screen[:, 2, :2] - screen[:, 0, :2]
+    area = edge1[:, 0] * edge2[:, 1] - edge2[:, 0] * edge1[:, 1]
+
+    return inside & (area != 0)
+
+
 class Camera:
 
-    def __init__(self, pos, look_at):
+    def __init__(self, pos, look_at, stats = None):
         """
         Construtor da Camera. Cria uma câmera a partir de uma posição inicial, um
         ponto de visão, campo de visão e uma razão de aspecto para a viewport.
@@ -33,11 +184,18 @@ class Camera:
         `pos`: posição da camera (x, y, z) dentro do sistema de coordenadas da Cena.
         `look_at`; ponto (x, y, z) para o qual a camera está "apontada".
         `fov`: field of view da Camera (graus).
+        `stats`: RenderStats onde são acumulados os tempos e contadores da camera (caso
+                 não seja passado é criado um novo).
         """
 
+        self.__stats = stats if stats is not None else RenderStats()
         self.__camera_objs = {}
         self.__proj_objs = {}
+        self.__stream_objs = {}
         self.__image = None
+        self.__color = None
+        self.__depth = None
+        self.__P = None
 
         look_at = np.asarray(look_at)
         pos = np.asarray(pos)
@@ -67,7 +225,7 @@ class Camera:
         # matriz de tranformação de sistema de coordenadas (sistema da cena para o sistema da camera)
         self.__M = np.matmul(R, T)
 
-    def add_object(self, alias, obj_info):
+    def add_object(self, alias, obj_info, model_matrix = None):
         """
         Adiciona um objeto da cena na Camera já realizando a troca de sistema de coordeadas.
 
@@ -75,19 +233,48 @@ class Camera:
         ------------
         `alias`: nome que faz referência ao objeto adicionado na camera.
         `obj_info`: array com os pontos do objeto ("matrix do objeto").
+        `model_matrix`: matriz 4x4 que leva os vértices do objeto para o sistema de coordenadas
+                        da cena (ver sceneGraph.SceneNode). Caso seja None os vértices já estão
+                        no sistema da cena. As duas matrizes são aplicadas em uma única passada.
         """
 
-        vertices_to_transform = [vertex for index, vertex in obj_info['v'].items()]
+        with self.__stats.stage('camera.add_object'):
+
+            transf_matrix = self.__M if model_matrix is None else np.matmul(self.__M, model_matrix)
+
+            vertices_to_transform = [vertex for index, vertex in obj_info['v'].items()]
+
+            transformed_vertices = Transformer().apply(obj_matrix = vertices_to_transform,
+                                                        transf_matrix = transf_matrix)
+
+            transformed_obj_info = {index: vertex for index, vertex in enumerate(transformed_vertices)}
+
+            camera_transformed = obj_info.copy()
+            camera_transformed['v'] = transformed_obj_info
 
-        transformed_vertices = Transformer().apply(obj_matrix = vertices_to_transform,
-                                                    transf_matrix = self.__M)
+            self.__camera_objs[alias] = camera_transformed
 
-        transformed_obj_info = {index: vertex for index, vertex in enumerate(transformed_vertices)}
+        self.__stats.count('vertices_transformed', len(vertices_to_transform))
+
+    def add_stream(self, alias, mesh, model_matrix = None):
+        """
+        Adiciona um objeto cujos vértices e faces são lidos diretamente de arrays em disco
+        (ver sceneObject::read_npy). Nenhum vértice é processado neste momento: a troca de
+        sistema de coordenadas e a projeção são feitas bloco a bloco durante a rasterização,
+        de modo que o objeto nunca precisa estar inteiro na memória.
+
+        Parametros
+        ------------
+        `alias`: nome que faz referência ao objeto adicionado na camera.
+        `mesh`: dicionário {'v': array (N, 3), 'f': array (M, 3) com índices base 0}
+                (normalmente np.memmap).
+        `model_matrix`: matriz 4x4 que leva os vértices do objeto para o sistema de coordenadas
+                        da cena (None caso os vértices já estejam no sistema da cena).
+        """
 
-        camera_transformed = obj_info.copy()
-        camera_transformed['v'] = transformed_obj_info
+        model_matrix = np.identity(4) if model_matrix is None else np.asarray(model_matrix)
 
-        self.__camera_objs[alias] = camera_transformed
+        self.__stream_objs[alias] = (mesh, model_matrix)
 
     def snapshot(self, fov, aspect_ratio, near, far):
         """
@@ -123,95 +310,295 @@ class Camera:
                               [0,  0,  C,  D],
                               [0,  0, -1,  0] ]
 
+        # utilizada na rasterização dos objetos adicionados com add_stream
+        self.__P = np.array(projection_matrix)
+
         for obj_alias, obj_info in self.__camera_objs.items():
 
-            vertices_to_transform = [vertex for index, vertex in obj_info['v'].items()]
+            with self.__stats.stage('snapshot.projection'):
 
-            transformed_vertices = Transformer().apply(obj_matrix = vertices_to_transform,
-                                                       transf_matrix = projection_matrix)
+                vertices_to_transform = [vertex for index, vertex in obj_info['v'].items()]
 
-            transformed_obj_info = {index: vertex for index, vertex in enumerate(transformed_vertices)}
+                transformed_vertices = Transformer().apply(obj_matrix = vertices_to_transform,
+                                                           transf_matrix = projection_matrix)
+
+                transformed_obj_info = {index: vertex for index, vertex in enumerate(transformed_vertices)}
 
-            projection_transformed = obj_info.copy()
-            projection_transformed['v'] = transformed_obj_info
+                projection_transformed = obj_info.copy()
+                projection_transformed['v'] = transformed_obj_info
 
-            self.__proj_objs[obj_alias] = projection_transformed
+                self.__proj_objs[obj_alias] = projection_transformed
 
-    def rasterize(self, res: tuple, filepath: str) -> None:
+            self.__stats.count('vertices_transformed', len(vertices_to_transform))
+
+    def rasterize(self, res: tuple, filepath: str = None, mode: str = 'wireframe',
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, occlusion: bool = True,
+                  occluder_fraction: float = 0.1, cluster_size: int = DEFAULT_CLUSTER_SIZE) -> None:
         """
         Realiza o processo de rasterização dos objetos que já estão no "sistema de
-        coordenadas da projeção".
+        coordenadas da projeção" e dos objetos adicionados com `add_stream`.
+
+        Os triângulos são processados em blocos de `chunk_size`: cada bloco é lido,
+        transformado, descartado (triângulos fora da imagem), projetado e rasterizado nos
+        buffers de cor e profundidade e então liberado. Para objetos adicionados com
+        `add_stream` a memória utilizada depende apenas do tamanho do bloco e da resolução.
 
         Parametros
         -----------
         `res': resolução da imagem gerada.
-        `filepath`: nome do arquivo onde a imagem gerada será salva.
+        `filepath`: nome do arquivo onde a imagem gerada será salva. Caso seja None a
+                    imagem não é salva (ver get_image).
+        `mode`: 'wireframe' desenha apenas as arestas dos triângulos; 'filled' preenche os
+                triângulos utilizando um buffer de profundidade.
+        `chunk_size`: quantidade de triângulos processados por vez.
+        `occlusion`: no modo 'filled', utiliza a profundidade dos objetos que ocupam mais de
+                     `occluder_fraction` da imagem para descartar os objetos (e os grupos de
+                     `cluster_size` triângulos) que eles escondem (ver occlusion.py). A
+                     imagem gerada é a mesma que com `occlusion` False.
         """
 
+        if mode not in ('wireframe', 'filled'):
+            raise ValueError(f'O atributo \'mode\' deve ser \'wireframe\' ou \'filled\'. Foi passado: \'{mode}\'.')
+
         # inicializa a imagem a ser gerada com uma matrix de zeros
-        self.__image = Image.new(mode = 'RGB', size = res)
+        with self.__stats.stage('rasterize.setup'):
+            self.__color = np.zeros((res[1], res[0], 3), dtype = np.uint8)
+            self.__depth = np.full((res[1], res[0]), np.inf, dtype = np.float32)
 
         colors = ['red', 'white', 'orange', 'pink']
 
+        # (vértices, faces, matriz de transformação, cor) de cada objeto, na ordem de desenho
+        meshes = []
+
         for (obj_alias, obj_info), c in zip(self.__proj_objs.items(), colors):
 
-            color = ImageColor.getrgb(c)
+            vertices = np.array(list(obj_info['v'].values()))
+            faces = face_indices(obj_info['f'])
+
+            meshes.append((vertices, faces, None, ImageColor.getrgb(c)))
+
+        for index, (obj_alias, (mesh, model_matrix)) in enumerate(self.__stream_objs.items()):
+
+            # os objetos lidos do disco continuam a sequencia de cores dos demais
+            c = colors[(len(self.__proj_objs) + index) % len(colors)]
+            transf_matrix = np.matmul(self.__P, np.matmul(self.__M, model_matrix))
+
+            meshes.append((mesh['v'], mesh['f'], transf_matrix, ImageColor.getrgb(c)))
+
+        if mode == 'filled' and occlusion:
+            self.__draw_with_occlusion(meshes, occluder_fraction, chunk_size, cluster_size)
+        else:
+            for vertices, faces, transf_matrix, color in meshes:
+                self.__draw_mesh(vertices, faces, transf_matrix, color, mode, chunk_size)
+
+        self.__image = Image.fromarray(self.__color, mode = 'RGB')
+
+        if filepath is not None:
+            with self.__stats.stage('rasterize.save'):
+                self.__image.save(filepath)
+
+    def __draw_with_occlusion(self, meshes, occluder_fraction, chunk_size, cluster_size) -> None:
+        """
+        Os objetos que ocupam mais de `occluder_fraction` da imagem (oclusores) são
+        rasterizados primeiro apenas em um buffer de profundidade separado, a partir do qual
+        a pirâmide de profundidade (ver occlusion.py) é construída uma única vez. Em seguida
+        todos os objetos são desenhados na ordem original: os demais objetos, quando
+        totalmente escondidos pelos oclusores, não são rasterizados e, nos que restam,
+        grupos de `cluster_size` triângulos escondidos são descartados. Sem oclusores, ou
+        sem outros objetos para testar, nada disso é feito.
+
+        Como a ordem de desenho não muda, pixels com a mesma profundidade continuam com a
+        cor do primeiro objeto desenhado: a imagem é a mesma que sem o culling.
+        """
+
+        height, width = self.__depth.shape
+
+        with self.__stats.stage('rasterize.occlusion'):
+            bounds = [self.__screen_bounds(vertices, transf_matrix, chunk_size)
+                      for vertices, _, transf_matrix, _ in meshes]
+
+            # área (dentro da imagem) ocupada pelo retângulo envolvente de cada objeto
+            areas = [max(0, min(high[0], width) - max(low[0], 0)) * max(0, min(high[1], height) - max(low[1], 0))
+                     for low, high in bounds]
+
+        occluders = {i for i, area in enumerate(areas) if area >= occluder_fraction * width * height}
+
+        if not occluders or len(occluders) == len(meshes):
+            # não há oclusores ou não há objetos a serem testados contra eles
+            for vertices, faces, transf_matrix, color in meshes:
+                self.__draw_mesh(vertices, faces, transf_matrix, color, 'filled', chunk_size)
+            return
+
+        # a profundidade final de cada pixel é sempre menor ou igual à dos oclusores
+        depth = np.full_like(self.__depth, np.inf)
+
+        for i in occluders:
+            vertices, faces, transf_matrix, _ = meshes[i]
+            for screen in self.__screen_chunks(vertices, faces, transf_matrix, chunk_size,
+                                               stage = 'rasterize.hiz', count = False):
+                with self.__stats.stage('rasterize.hiz'):
+                    _fill_triangles(self.__color, depth, screen[_visible(screen, width, height)],
+                                    np.zeros(3, dtype = np.uint8), False)
+
+        with self.__stats.stage('rasterize.hiz'):
+            hiz = HiZBuffer(depth)
+
+        for i, (vertices, faces, transf_matrix, color) in enumerate(meshes):
+
+            if i in occluders:
+                # os oclusores não são testados contra a sua própria profundidade
+                self.__draw_mesh(vertices, faces, transf_matrix, color, 'filled', chunk_size)
+                continue
+
+            with self.__stats.stage('rasterize.occlusion'):
+                low, high = bounds[i]
+                hidden = hiz.occluded(low[0], low[1], high[0], high[1], low[2])
+
+            if hidden:
+                self.__stats.count('triangles_submitted', len(faces))
+                self.__stats.count('triangles_occlusion_culled', len(faces))
+                continue
+
+            self.__draw_mesh(vertices, faces, transf_matrix, color, 'filled', chunk_size,
+                             hiz = hiz, cluster_size = cluster_size)
+
+    def __screen_bounds(self, vertices, transf_matrix, chunk_size) -> tuple:
+        """
+        Menor e maior (x, y, profundidade) na imagem do retângulo envolvente do objeto.
+        Como a projeção é linear basta projetar os 8 cantos da caixa envolvente.
+        """
+
+        low = np.full(3, np.inf)
+        high = np.full(3, -np.inf)
+
+        # os vértices são percorridos em blocos (podem ser um np.memmap)
+        for start in range(0, len(vertices), chunk_size):
+            block = np.asarray(vertices[start:start + chunk_size], dtype = np.float64)
+            low = np.minimum(low, block.min(axis = 0))
+            high = np.maximum(high, block.max(axis = 0))
 
-            for face in obj_info['f']:
+        if transf_matrix is not None and np.isfinite(low).all():
+            box = np.array([[x, y, z] for x in (low[0], high[0]) for y in (low[1], high[1]) for z in (low[2], high[2])])
+            box = np.matmul(box, transf_matrix[:3, :3].T) + transf_matrix[:3, 3]
+            low, high = box.min(axis = 0), box.max(axis = 0)
 
-                v1 = self.__proj_objs[obj_alias]['v'][ face[0] - 1 ]
-                v2 = self.__proj_objs[obj_alias]['v'][ face[1] - 1 ]
-                v3 = self.__proj_objs[obj_alias]['v'][ face[2] - 1 ]
+        scale = np.array([50, 50, 1])
+        offset = np.array([200, 200, 0])
+
+        return low * scale + offset, high * scale + offset
+
+    def __draw_mesh(self, vertices, faces, transf_matrix, color, mode, chunk_size,
+                    hiz = None, cluster_size = DEFAULT_CLUSTER_SIZE) -> None:
+        """
+        Rasteriza os triângulos de um objeto, um bloco de `chunk_size` triângulos por vez.
+
+        Parametros
+        ----------
+        `vertices`: array (N, 3) de vértices (pode ser um np.memmap).
+        `faces`: array (M, 3) com os índices (base 0) dos vértices de cada triângulo.
+        `transf_matrix`: matriz aplicada nos vértices antes da rasterização (None caso os
+                         vértices já estejam no sistema de coordenadas da projeção).
+        `hiz`: HiZBuffer utilizado para descartar grupos de `cluster_size` triângulos
+               escondidos (apenas no modo 'filled').
+        """
+
+        color = np.array(color, dtype = np.uint8)
+
+        for screen in self.__screen_chunks(vertices, faces, transf_matrix, chunk_size):
+
+            if mode == 'wireframe':
+                with self.__stats.stage('rasterize.draw'):
+                    pixels = _draw_wireframe(self.__color, screen[:, :, :2].astype(np.int64), color)
+
+                # não há etapa de descarte no modo wireframe: coordenadas negativas são
+                # desenhadas a partir do final da imagem (ver _draw_line)
+                culled = 0
+                drawn = len(screen)
+            else:
+                with self.__stats.stage('rasterize.cull'):
+                    visible = _visible(screen, self.__color.shape[1], self.__color.shape[0])
+                    culled = len(screen) - int(visible.sum())
+
+                occlusion_culled = 0
+
+                if hiz is not None:
+                    with self.__stats.stage('rasterize.occlusion'):
+                        hidden = self.__hidden_clusters(screen, hiz, cluster_size)
+                        occlusion_culled = int((hidden & visible).sum())
+                        visible &= ~hidden
+
+                    self.__stats.count('triangles_occlusion_culled', occlusion_culled)
+
+                with self.__stats.stage('rasterize.draw'):
+                    pixels = _fill_triangles(self.__color, self.__depth, screen[visible], color)
+
+                drawn = len(screen) - culled - occlusion_culled
+
+            self.__stats.count('triangles_submitted', len(screen))
+            self.__stats.count('triangles_drawn', drawn)
+            # triângulos fora da imagem ou degenerados (sempre 0 no modo wireframe)
+            self.__stats.count('triangles_culled', culled)
+            self.__stats.count('pixels_written', pixels)
+
+    def __screen_chunks(self, vertices, faces, transf_matrix, chunk_size,
+                        stage = 'rasterize.transform', count = True):
+        """
+        Percorre os triângulos de um objeto em blocos de `chunk_size`, retornando para cada
+        bloco um array (T, 3, 3) com x, y na imagem e a profundidade de cada vértice.
+        O tempo é acumulado na etapa `stage` e, com `count` False, os vértices não entram
+        no contador 'vertices_transformed' (ex: na pré-passada dos oclusores).
+        """
+
+        for start in range(0, len(faces), chunk_size):
+
+            with self.__stats.stage(stage):
+                # apenas os vértices utilizados pelo bloco são lidos
+                corners = np.asarray(vertices[np.asarray(faces[start:start + chunk_size]).ravel()],
+                                     dtype = np.float64)
+
+                if transf_matrix is not None:
+                    corners = np.matmul(corners, transf_matrix[:3, :3].T) + transf_matrix[:3, 3]
+                    if count:
+                        self.__stats.count('vertices_transformed', len(corners))
 
                 # gambiarra alert!
                 # por alguma razão aescala não é mantida e os valores ficam muito pequenos
                 # para serem vistos na image.
 
                 # no blender, entretanto, os objetos sao mostrados como deveriam estar
-                v1 = list(map(int, v1 * 50 + 200))
-                v2 = list(map(int, v2 * 50 + 200))
-                v3 = list(map(int, v3 * 50 + 200))
+                screen = (corners * 50 + 200).reshape(-1, 3, 3)
+                screen[:, :, 2] = corners[:, 2].reshape(-1, 3)
 
-                self.__draw_lines(v1[0], v1[1], v2[0], v2[1], color)
-                self.__draw_lines(v1[0], v1[1], v3[0], v3[1], color)
-                self.__draw_lines(v2[0], v1[1], v3[0], v2[1], color)
+            yield screen
 
-        self.__image.save(filepath)
-
-    def __draw_lines(self, x0, y0, x1, y1, color) -> None:
+    def __hidden_clusters(self, screen, hiz, cluster_size) -> np.ndarray:
         """
-        Desenha as linhas utilizando as coordenadas X e Y dos pontos passados utilizando
-        o algoritmo de Bresenham
+        Máscara dos triângulos de `screen` (array (T, 3, 3)) que pertencem a grupos de
+        `cluster_size` triângulos consecutivos totalmente escondidos.
         """
 
-        dx = x1 - x0
-        dy = y1 - y0
-
-        d = 2 * dy - dx
+        starts = np.arange(0, len(screen), cluster_size)
 
-        inc_e = 2 * dy
-        inc_ne = 2 * (dy - dx)
+        low = np.minimum.reduceat(screen.min(axis = 1), starts, axis = 0)
+        high = np.maximum.reduceat(screen.max(axis = 1), starts, axis = 0)
 
-        x = x0
-        y = y0
+        sizes = np.diff(np.append(starts, len(screen)))
 
-        # evita que os pixels ficam se expelhando na cena 
-        if not ((x < 0) and (y < 0)):
-            self.__image.putpixel((x, y), color)
+        return np.repeat(hiz.occluded_many(low, high), sizes)
 
-        while x < x1:
+    def get_image(self) -> Image.Image:
+        """
+        Encapsula a obtenção da imagem gerada pela última rasterização.
+        """
 
-            if d <= 0:
-                d = d + inc_e
-                x += 1
+        return self.__image
 
-            else:
-                d = d + inc_ne
-                x += 1
-                y += 1
+    def get_stats(self) -> RenderStats:
+        """
+        Encapsula a obtenção dos tempos e contadores acumulados pela camera.
+        """
 
-            if not ((x < 0) and (y < 0)):
-                self.__image.putpixel((x, y), color)
+        return self.__stats
 
     def to_obj(self, proj: bool) -> None:
         """
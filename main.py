@@ -74,3 +74,6 @@ camera.snapshot(aspect_ratio = 0.5,
 camera.to_obj(proj = True)
 
 camera.rasterize(res = (800, 600), filepath = 'imagem.png')
+
+# tempos de cada etapa e contadores (vértices, triângulos e pixels) da renderização
+print(camera.get_stats())
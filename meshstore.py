@@ -0,0 +1,322 @@
+"""
+Armazenamento de objetos em memória compartilhada para renderização com vários processos.
+
+Enviar um objeto no formato de sceneObject::read_obj ({'v': {índice: np.array}, 'f': [...]})
+para outro processo exige serializar (pickle) todos os vértices e faces. Com o
+`SharedMeshStore` os arrays de cada objeto (vértices, faces, normais, ...) são copiados
+uma única vez para um bloco de `multiprocessing.shared_memory`; o `SharedMesh` retornado
+contém apenas o nome do bloco e a posição de cada array, de modo que pode ser enviado
+para outros processos em tempo constante, independente do tamanho do objeto. Ao ser
+recebido o bloco é aberto pelo nome e os arrays são acessados como views somente
+leitura, sem cópia.
+
+`SharedMesh` se comporta como o dicionário de sceneObject::read_obj (pode ser utilizado
+diretamente em Scene, Camera.add_object, sceneObject e save_obj). Uma Scene cujos objetos
+são SharedMesh também é enviada para outros processos em tempo constante.
+
+Exemplo
+-------
+    with SharedMeshStore() as store:
+        escultura = store.put(read_obj('./exemplos-3D/coarseTri.fertility.full.obj'))
+        pool.submit(render, Scene(objs = {'escultura': escultura}))
+"""
+
+import uuid
+import threading
+import numpy as np
+
+from collections.abc import Mapping
+from multiprocessing import shared_memory, resource_tracker
+
+
+# alinhamento (bytes) de cada array dentro do bloco compartilhado
+ALIGNMENT = 64
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Abre um bloco já existente. Quando disponível (Python >= 3.13) o bloco não é registrado
+    no resource_tracker do processo que apenas o utiliza: quem remove o bloco é o dono.
+    """
+
+    try:
+        return shared_memory.SharedMemory(name = name, track = False)
+    except TypeError:
+        return shared_memory.SharedMemory(name = name)
+
+
+def create_block(obj_info: dict) -> tuple:
+    """
+    Copia os arrays do objeto para um novo bloco de memória compartilhada, sem registrá-lo
+    em nenhum SharedMeshStore. Pode ser executado em outro processo: o bloco é então
+    entregue ao dono com SharedMeshStore.adopt(nome, layout).
+
+    Parametros
+    ----------
+    `obj_info`: dicionário com as informações sobre o objeto (ver sceneObject::read_obj).
+
+    Retorna
+    --------
+    - tupla (bloco de memória compartilhada, layout dos arrays no bloco (ver SharedMesh))
+    """
+
+    arrays = {}
+    for key, items in obj_info.items():
+        if key == 'v':
+            items = list(items.values())
+
+        if len(items) == 0:
+            arrays[key] = (np.zeros((0, 3)), None)
+        elif len({len(item) for item in items}) == 1:
+            arrays[key] = (np.asarray(items), None)
+        else:
+            # itens de tamanhos diferentes: um único array e o início de cada item
+            splits = np.cumsum([len(item) for item in items])[:-1]
+            arrays[key] = (np.concatenate([np.asarray(item) for item in items]), splits)
+
+    layout = {}
+    size = 0
+
+    def reserve(array):
+        nonlocal size
+        entry = (size, array.shape, array.dtype.str)
+        size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        return entry
+
+    for key, (array, splits) in arrays.items():
+        layout[key] = reserve(array) + (reserve(splits) if splits is not None else None,)
+
+    shm = shared_memory.SharedMemory(name = f'mesh_{uuid.uuid4().hex[:16]}', create = True,
+                                     size = max(size, 1))
+
+    for key, (array, splits) in arrays.items():
+        offset, shape, dtype, splits_entry = layout[key]
+        np.ndarray(shape, dtype = dtype, buffer = shm.buf, offset = offset)[...] = array
+
+        if splits is not None:
+            offset, shape, dtype = splits_entry
+            np.ndarray(shape, dtype = dtype, buffer = shm.buf, offset = offset)[...] = splits
+
+    return shm, layout
+
+
+class SharedMesh(Mapping):
+
+    def __init__(self, name: str, layout: dict, shm = None):
+        """
+        Objeto (no formato de sceneObject::read_obj) cujos arrays estão em memória
+        compartilhada. Não deve ser criado diretamente (ver SharedMeshStore.put).
+
+        Parametros
+        ----------
+        `name`: nome do bloco de memória compartilhada.
+        `layout`: dicionário {chave: (deslocamento, shape, dtype, divisões)} de cada array
+                  no bloco. Itens de tamanhos diferentes (ex: 'ce') são guardados em um
+                  único array e `divisões` indica onde cada item começa (ou None).
+        `shm`: bloco já aberto (no processo dono); caso None é aberto no primeiro acesso.
+        """
+
+        self.name = name
+        self.__layout = layout
+        self.__shm = shm
+        self.__arrays = None
+        self.__vertices = None
+
+    def __getstate__(self):
+        # apenas o nome e a posição dos arrays são enviados para outros processos
+        return {'name': self.name, 'layout': self.__layout}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'], state['layout'])
+
+    def arrays(self) -> dict:
+        """
+        Retorna os arrays (views somente leitura sobre a memória compartilhada).
+        'v' tem shape (N, 3); as demais chaves têm shape (M, k), ou são listas de views
+        quando os itens têm tamanhos diferentes.
+        """
+
+        if self.__arrays is None:
+            if self.__shm is None:
+                self.__shm = _attach(self.name)
+
+            self.__arrays = {}
+            for key, (offset, shape, dtype, splits) in self.__layout.items():
+                array = self.__view(offset, shape, dtype)
+
+                if splits is not None:
+                    array = np.split(array, self.__view(*splits))
+
+                self.__arrays[key] = array
+
+        return self.__arrays
+
+    def __view(self, offset, shape, dtype) -> np.ndarray:
+        array = np.ndarray(shape, dtype = dtype, buffer = self.__shm.buf, offset = offset)
+        array.flags.writeable = False
+        return array
+
+    def __getitem__(self, key):
+
+        if key == 'v':
+            # mesmo formato de sceneObject::read_obj: {índice: vértice}
+            if self.__vertices is None:
+                self.__vertices = dict(enumerate(self.arrays()['v']))
+            return self.__vertices
+
+        return self.arrays()[key]
+
+    def __iter__(self):
+        return iter(self.__layout)
+
+    def __len__(self):
+        return len(self.__layout)
+
+    def copy(self) -> dict:
+        """
+        Retorna um dicionário com as mesmas chaves (os arrays não são copiados).
+        """
+
+        return {key: self[key] for key in self}
+
+    def nbytes(self) -> int:
+        """
+        Tamanho (em bytes) dos arrays do objeto.
+        """
+
+        return sum(int(np.prod(shape)) * np.dtype(dtype).itemsize
+                   + (int(np.prod(splits[1])) * np.dtype(splits[2]).itemsize if splits else 0)
+                   for _, shape, dtype, splits in self.__layout.values())
+
+    def close(self) -> None:
+        """
+        Fecha o bloco neste processo (as views obtidas deixam de ser válidas).
+        """
+
+        self.__arrays = None
+        self.__vertices = None
+
+        if self.__shm is not None:
+            self.__shm.close()
+            self.__shm = None
+
+
+class SharedMeshStore:
+
+    def __init__(self):
+        """
+        Dono dos blocos de memória compartilhada. Cada objeto adicionado com `put` possui
+        um contador de referências: o bloco é removido quando o contador chega a zero
+        (ver `acquire` e `release`) ou quando o store é fechado.
+        """
+
+        self.__lock = threading.Lock()
+        self.__blocks = {}
+
+        # processos criados a partir deste passam a utilizar o mesmo resource_tracker, que
+        # é quem registra os blocos abertos: caso contrário cada processo teria o seu e
+        # removeria os blocos que abriu ao terminar
+        resource_tracker.ensure_running()
+
+    def put(self, obj_info: dict) -> SharedMesh:
+        """
+        Copia os arrays do objeto para um novo bloco de memória compartilhada.
+        O objeto retornado começa com uma referência.
+
+        Parametros
+        ----------
+        `obj_info`: dicionário com as informações sobre o objeto (ver sceneObject::read_obj).
+        """
+
+        shm, layout = create_block(obj_info)
+        return self.__register(shm, layout)
+
+    def adopt(self, name: str, layout: dict) -> SharedMesh:
+        """
+        Passa a ser o dono de um bloco criado com `create_block` em outro processo (ex:
+        um processo que leu o arquivo .obj). O objeto retornado começa com uma referência.
+        """
+
+        return self.__register(shared_memory.SharedMemory(name = name), layout)
+
+    def __register(self, shm, layout) -> SharedMesh:
+
+        mesh = SharedMesh(shm.name, layout, shm = shm)
+
+        with self.__lock:
+            self.__blocks[shm.name] = [shm, 1]
+
+        return mesh
+
+    def acquire(self, mesh: SharedMesh) -> SharedMesh:
+        """
+        Adiciona uma referência ao objeto.
+        """
+
+        with self.__lock:
+            self.__blocks[mesh.name][1] += 1
+
+        return mesh
+
+    def release(self, mesh: SharedMesh) -> None:
+        """
+        Remove uma referência do objeto. Quando não há mais referências o bloco é removido
+        (processos que ainda o tenham aberto continuam com acesso até fecharem o bloco).
+        """
+
+        with self.__lock:
+            block = self.__blocks[mesh.name]
+            block[1] -= 1
+
+            if block[1] > 0:
+                return
+
+            del self.__blocks[mesh.name]
+
+        self.__unlink(block[0])
+
+    def refcount(self, mesh: SharedMesh) -> int:
+        """
+        Quantidade de referências do objeto (0 caso já tenha sido removido).
+        """
+
+        with self.__lock:
+            return self.__blocks[mesh.name][1] if mesh.name in self.__blocks else 0
+
+    def nbytes(self) -> int:
+        """
+        Memória compartilhada ocupada por todos os objetos do store.
+        """
+
+        with self.__lock:
+            return sum(shm.size for shm, _ in self.__blocks.values())
+
+    def close(self) -> None:
+        """
+        Remove todos os blocos, independente da quantidade de referências.
+        """
+
+        with self.__lock:
+            blocks, self.__blocks = self.__blocks, {}
+
+        for shm, _ in blocks.values():
+            self.__unlink(shm)
+
+    def __unlink(self, shm) -> None:
+        try:
+            shm.close()
+        except BufferError:
+            # ainda existem views deste processo sobre o bloco: ele é fechado quando elas
+            # forem coletadas, mas o nome já pode ser removido
+            pass
+        shm.unlink()
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__blocks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,26 +1,105 @@
 # Referência: https://www.pygame.org/wiki/OBJFileLoader
+"""
+Carregamento de arquivos .obj para visualização com OpenGL.
 
-import pygame
-from OpenGL.GL import *
-from sceneObject import sceneObject, read_obj
+O carregamento é separado em duas etapas independentes:
 
-def MTL(filename):
-    contents = {}
-    mtl = None
-    for line in open(filename, "r"):
-        if line.startswith('#'): continue
-        values = line.split()
-        if not values: continue
-        if values[0] == 'newmtl':
-            mtl = contents[values[1]] = {}
-        elif mtl is None:
-            raise ValueError ("mtl file doesn't start with newmtl stmt")
-        elif values[0] == 'map_Kd':
-            # load the texture referred to by this declaration
-            mtl[values[0]] = values[1]
-            surf = pygame.image.load(mtl['map_Kd'])
-            image = pygame.image.tostring(surf, 'RGBA', 1)
-            ix, iy = surf.get_rect().size
+    - `parse_obj`: leitura do arquivo e montagem (com numpy) de um buffer intercalado
+      de vértices (posição, normal, coordenada de textura) e de um array de índices
+      pronto para `glDrawElements`. Não depende de OpenGL nem de pygame, podendo ser
+      executado (e medido) sem um contexto gráfico.
+    - `OBJ.upload` / `OBJ.render`: envio dos buffers para a GPU (VBOs) e desenho. Só
+      são chamados quando já existe um contexto OpenGL.
+
+As bibliotecas OpenGL e pygame são importadas apenas dentro das funções que as utilizam.
+"""
+
+import os
+import numpy as np
+
+
+# quantidade de floats por vértice no buffer intercalado: posição (3), normal (3), textura (2)
+VERTEX_SIZE = 8
+VERTEX_STRIDE = VERTEX_SIZE * np.dtype(np.float32).itemsize
+
+# normal utilizada quando o arquivo não define normais (mesmo valor padrão do OpenGL)
+DEFAULT_NORMAL = (0.0, 0.0, 1.0)
+
+# imagens de textura já decodificadas, compartilhadas entre todos os materiais
+_texture_cache = {}
+
+
+def load_texture_image(filepath) -> tuple:
+    """
+    Decodifica (uma única vez) a imagem de textura em bytes RGBA.
+
+    Retorna
+    --------
+    - tupla (bytes RGBA, largura, altura)
+    """
+
+    filepath = os.path.abspath(filepath)
+
+    if filepath not in _texture_cache:
+        import pygame
+
+        surf = pygame.image.load(filepath)
+        image = pygame.image.tostring(surf, 'RGBA', 1)
+        ix, iy = surf.get_rect().size
+        _texture_cache[filepath] = (image, ix, iy)
+
+    return _texture_cache[filepath]
+
+
+class MTL(dict):
+
+    def __init__(self, filename):
+        """
+        Le um arquivo .mtl. As texturas referenciadas por 'map_Kd' não são decodificadas
+        na leitura: a imagem é carregada (e mantida em cache) apenas na primeira vez em que
+        o material é utilizado com `bind`.
+
+        Parametros
+        ----------
+        `filename`: arquivo .mtl a ser carregado.
+        """
+
+        super().__init__()
+
+        self.__dirname = os.path.dirname(filename)
+
+        mtl = None
+        for line in open(filename, "r"):
+            if line.startswith('#'): continue
+            values = line.split()
+            if not values: continue
+            if values[0] == 'newmtl':
+                mtl = self[values[1]] = {}
+            elif mtl is None:
+                raise ValueError ("mtl file doesn't start with newmtl stmt")
+            elif values[0] == 'map_Kd':
+                mtl[values[0]] = os.path.join(self.__dirname, values[1])
+            else:
+                mtl[values[0]] = list(map(float, values[1:]))
+
+    def bind(self, material) -> None:
+        """
+        Ativa a textura do material (se houver), gerando a textura no OpenGL na
+        primeira utilização. Requer um contexto OpenGL ativo.
+        """
+
+        from OpenGL.GL import (glGenTextures, glBindTexture, glTexParameteri, glTexImage2D,
+                               GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_TEXTURE_MAG_FILTER,
+                               GL_LINEAR, GL_RGBA, GL_UNSIGNED_BYTE)
+
+        mtl = self.get(material)
+        if mtl is None or 'map_Kd' not in mtl:
+            # material sem textura: não herda a textura do grupo desenhado anteriormente
+            glBindTexture(GL_TEXTURE_2D, 0)
+            return
+
+        if 'texture_Kd' not in mtl:
+            image, ix, iy = load_texture_image(mtl['map_Kd'])
             texid = mtl['texture_Kd'] = glGenTextures(1)
             glBindTexture(GL_TEXTURE_2D, texid)
             glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER,
@@ -29,70 +108,236 @@ def MTL(filename):
                 GL_LINEAR)
             glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, ix, iy, 0, GL_RGBA,
                 GL_UNSIGNED_BYTE, image)
-        else:
-            mtl[values[0]] = list(map(float, values[1:]))
-    return contents
+
+        glBindTexture(GL_TEXTURE_2D, mtl['texture_Kd'])
+
+
+def _to_array(lines, columns, dtype) -> np.ndarray:
+    """
+    Converte de uma só vez as linhas de um mesmo tipo ('v', 'vn', 'vt') em um array
+    com `columns` colunas. Colunas excedentes (ex: componente w) são descartadas e colunas
+    ausentes (ex: 'vt u', sem o v) são preenchidas com 0.
+    """
+
+    array = np.zeros((len(lines), columns), dtype = dtype)
+
+    if not lines:
+        return array
+
+    sizes = {len(line) for line in lines}
+
+    if len(sizes) == 1:
+        size = sizes.pop()
+        data = np.array(' '.join(' '.join(line) for line in lines).split(), dtype = dtype)
+        data = data.reshape(len(lines), size)[:, :columns]
+    else:
+        data = np.array([line[:columns] + ['0'] * (columns - len(line)) for line in lines], dtype = dtype)
+
+    array[:, :data.shape[1]] = data
+    return array
+
+
+def _resolve(indices, count) -> np.ndarray:
+    """
+    Converte índices do .obj (base 1, negativos relativos ao último elemento lido antes
+    da face) para base 0. Índices ausentes (0) viram -1.
+
+    `count` é a quantidade de elementos já lidos quando cada índice apareceu no arquivo
+    (um número ou um array do mesmo tamanho de `indices`).
+    """
+
+    return np.where(indices > 0, indices - 1, np.where(indices < 0, indices + count, -1))
+
+
+def parse_obj(filename, swapyz = False) -> dict:
+    """
+    Le um arquivo .obj e monta os buffers utilizados na renderização.
+
+    Faces com mais de 3 vértices são trianguladas em leque. Cada combinação distinta de
+    (vértice, textura, normal) gera um vértice no buffer intercalado.
+
+    Parametros
+    ----------
+    `filename`: arquivo .obj a ser carregado.
+    `swapyz`: troca as coordenadas y e z das posições e normais.
+
+    Retorna
+    --------
+    - dicionário com as chaves:
+        'vertices':  array float32 (N, 8) com posição, normal e textura intercalados;
+        'indices':   array uint32 (T * 3,) com os índices dos triângulos;
+        'groups':    lista de (material, primeiro índice, quantidade de índices);
+        'mtllib':    caminho do arquivo .mtl referenciado (ou None).
+    """
+
+    lines = {'v': [], 'vn': [], 'vt': []}
+    corners = []
+    # quantidade de 'v', 'vt' e 'vn' lidos até a face de cada canto (índices negativos)
+    counts = []
+    groups = []
+    mtllib = None
+
+    material = None
+    for line in open(filename, "r"):
+        values = line.split()
+        if not values or values[0].startswith('#'): continue
+        if values[0] in lines:
+            lines[values[0]].append(values[1:])
+        elif values[0] in ('usemtl', 'usemat'):
+            material = values[1]
+        elif values[0] == 'mtllib':
+            mtllib = os.path.join(os.path.dirname(filename), values[1])
+        elif values[0] == 'f':
+            face = values[1:]
+            if not groups or groups[-1][0] != material:
+                groups.append([material, len(corners), 0])
+            # triangulação em leque: (0, i, i + 1)
+            for i in range(1, len(face) - 1):
+                corners += (face[0], face[i], face[i + 1])
+            counts += [(len(lines['v']), len(lines['vt']), len(lines['vn']))] * (3 * (len(face) - 2))
+            groups[-1][2] = len(corners) - groups[-1][1]
+
+    positions = _to_array(lines['v'], 3, np.float32)
+    normals = _to_array(lines['vn'], 3, np.float32)
+    texcoords = _to_array(lines['vt'], 2, np.float32)
+
+    if swapyz:
+        positions = positions[:, [0, 2, 1]]
+        normals = normals[:, [0, 2, 1]]
+
+    if not corners:
+        refs = np.zeros((0, 3), dtype = np.int64)
+
+    elif not any('/' in corner for corner in corners):
+        refs = np.zeros((len(corners), 3), dtype = np.int64)
+        refs[:, 0] = np.array(corners, dtype = np.int64)
+
+    else:
+        refs = np.array([(corner + '//').split('/')[:3] for corner in corners])
+        refs = np.where(refs == '', '0', refs).astype(np.int64)
+
+    counts = np.array(counts, dtype = np.int64).reshape(-1, 3)
+
+    refs[:, 0] = _resolve(refs[:, 0], counts[:, 0])
+    refs[:, 1] = _resolve(refs[:, 1], counts[:, 1])
+    refs[:, 2] = _resolve(refs[:, 2], counts[:, 2])
+
+    if (refs[:, 1:] < 0).all():
+        # sem textura nem normal: os próprios vértices do arquivo formam o buffer
+        keys = np.full((len(positions), 3), -1, dtype = np.int64)
+        keys[:, 0] = np.arange(len(positions))
+        indices = refs[:, 0]
+    else:
+        keys, indices = np.unique(refs, axis = 0, return_inverse = True)
+
+    vertices = np.zeros((len(keys), VERTEX_SIZE), dtype = np.float32)
+    vertices[:, 0:3] = positions[keys[:, 0]]
+    vertices[:, 3:6] = DEFAULT_NORMAL
+
+    has_normal = keys[:, 2] >= 0
+    vertices[has_normal, 3:6] = normals[keys[has_normal, 2]]
+
+    has_texture = keys[:, 1] >= 0
+    vertices[has_texture, 6:8] = texcoords[keys[has_texture, 1]]
+
+    return {
+        'vertices': vertices,
+        'indices': indices.reshape(-1).astype(np.uint32),
+        'groups': [tuple(group) for group in groups],
+        'mtllib': mtllib,
+    }
+
 
 class OBJ:
     def __init__(self, filename, swapyz=False):
-        """Loads a Wavefront OBJ file. """
-        self.vertices = []
-        self.normals = []
-        self.texcoords = []
-        self.faces = []
+        """
+        Loads a Wavefront OBJ file.
+
+        Apenas le o arquivo (ver `parse_obj`); os buffers são enviados para a GPU na
+        primeira chamada de `render` (ou explicitamente com `upload`).
+        """
+
+        mesh = parse_obj(filename, swapyz = swapyz)
+
+        self.vertices = mesh['vertices']
+        self.indices = mesh['indices']
+        self.groups = mesh['groups']
+        self.mtl = MTL(mesh['mtllib']) if mesh['mtllib'] is not None else None
+
+        self.vbo = None
+        self.ebo = None
+
+    def upload(self) -> None:
+        """
+        Envia o buffer de vértices e o buffer de índices para a GPU.
+        Requer um contexto OpenGL ativo.
+        """
+
+        from OpenGL.GL import (glGenBuffers, glBindBuffer, glBufferData,
+                               GL_ARRAY_BUFFER, GL_ELEMENT_ARRAY_BUFFER, GL_STATIC_DRAW)
+
+        self.vbo, self.ebo = glGenBuffers(2)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def render(self) -> None:
+        """
+        Desenha o objeto com `glDrawElements` a partir dos buffers na GPU.
+        """
+
+        from OpenGL.GL import (glBindBuffer, glEnableClientState, glDisableClientState,
+                               glVertexPointer, glNormalPointer, glTexCoordPointer,
+                               glDrawElements, glEnable, glDisable, glFrontFace, GL_CCW,
+                               GL_ARRAY_BUFFER, GL_ELEMENT_ARRAY_BUFFER, GL_VERTEX_ARRAY,
+                               GL_NORMAL_ARRAY, GL_TEXTURE_COORD_ARRAY, GL_TEXTURE_2D,
+                               GL_FLOAT, GL_TRIANGLES, GL_UNSIGNED_INT)
+
+        if self.vbo is None:
+            self.upload()
 
-        material = None
-        for line in open(filename, "r"):
-            if line.startswith('#'): continue
-            values = line.split()
-            if not values: continue
-            if values[0] == 'v':
-                v = list(map(float, values[1:4]))
-                if swapyz:
-                    v = v[0], v[2], v[1]
-                self.vertices.append(v)
-            elif values[0] == 'vn':
-                v = list(map(float, values[1:4]))
-                if swapyz:
-                    v = v[0], v[2], v[1]
-                self.normals.append(v)
-            elif values[0] == 'vt':
-                self.texcoords.append(list(map(float, values[1:3])))
-            elif values[0] in ('usemtl', 'usemat'):
-                material = values[1]
-            elif values[0] == 'mtllib':
-                self.mtl = MTL(values[1])
-            elif values[0] == 'f':
-                face = []
-                texcoords = []
-                norms = []
-                for v in values[1:]:
-                    w = v.split('/')
-                    face.append(int(w[0]))
-                    if len(w) >= 2 and len(w[1]) > 0:
-                        texcoords.append(int(w[1]))
-                    else:
-                        texcoords.append(0)
-                    if len(w) >= 3 and len(w[2]) > 0:
-                        norms.append(int(w[2]))
-                    else:
-                        norms.append(0)
-                self.faces.append((face, norms, texcoords, material))
-
-        self.gl_list = glGenLists(1)
-        glNewList(self.gl_list, GL_COMPILE)
         glEnable(GL_TEXTURE_2D)
         glFrontFace(GL_CCW)
-        for face in self.faces:
-            vertices, normals, texture_coords, material = face
-
-            glBegin(GL_POLYGON)
-            for i in range(len(vertices)):
-                if normals[i] > 0:
-                    glNormal3fv(self.normals[normals[i] - 1])
-                if texture_coords[i] > 0:
-                    glTexCoord2fv(self.texcoords[texture_coords[i] - 1])
-                glVertex3fv(self.vertices[vertices[i] - 1])
-            glEnd()
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+
+        float_size = np.dtype(np.float32).itemsize
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, None)
+        glNormalPointer(GL_FLOAT, VERTEX_STRIDE, _pointer(3 * float_size))
+        glTexCoordPointer(2, GL_FLOAT, VERTEX_STRIDE, _pointer(6 * float_size))
+
+        for material, first, count in self.groups:
+            if self.mtl is not None:
+                self.mtl.bind(material)
+            glDrawElements(GL_TRIANGLES, count, GL_UNSIGNED_INT,
+                           _pointer(first * self.indices.itemsize))
+
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
         glDisable(GL_TEXTURE_2D)
-        glEndList()
\ No newline at end of file
+
+
+def _pointer(offset):
+    """
+    Deslocamento (em bytes) dentro do buffer ligado, no formato esperado pelo PyOpenGL.
+    """
+
+    import ctypes
+
+    return ctypes.c_void_p(offset)
@@ -0,0 +1,129 @@
+"""
+Culling por oclusão com buffer de profundidade hierárquico (Hi-Z).
+
+A partir do buffer de profundidade da rasterização é construída uma pirâmide em que cada
+nível guarda, para cada bloco de 2x2 pixels do nível anterior, a maior profundidade do
+bloco. Um retângulo da imagem cuja menor profundidade é maior do que a maior profundidade
+já desenhada em toda a sua área está totalmente escondido, e o que estiver dentro dele
+(um objeto ou um grupo de triângulos) não precisa ser rasterizado.
+
+Como o buffer de profundidade só diminui durante a rasterização, uma pirâmide construída
+antes de novos triângulos serem desenhados continua sendo conservadora: ela pode deixar de
+descartar algo escondido, mas nunca descarta algo visível.
+"""
+
+import numba
+import numpy as np
+
+
+# quantidade máxima de células (em cada direção) consultadas por teste
+MAX_CELLS = 4
+
+
+def _downsample(level) -> np.ndarray:
+    """
+    Próximo nível da pirâmide: maior profundidade de cada bloco de 2x2 células.
+    """
+
+    h, w = level.shape
+
+    if h % 2 or w % 2:
+        # completa com -inf para que as dimensões sejam pares (não altera o máximo)
+        padded = np.full((h + h % 2, w + w % 2), -np.inf, dtype = level.dtype)
+        padded[:h, :w] = level
+        level = padded
+
+    return np.maximum(np.maximum(level[0::2, 0::2], level[1::2, 0::2]),
+                      np.maximum(level[0::2, 1::2], level[1::2, 1::2]))
+
+
+@numba.njit(cache = True)
+def _occluded(data, offsets, heights, widths, x0, y0, x1, y1, zmin) -> bool:
+    """
+    Teste de um retângulo contra a pirâmide guardada em um único array (`data`), em que o
+    nível k começa em offsets[k] e tem heights[k] x widths[k] células.
+    """
+
+    x0, y0 = max(int(np.floor(x0)), 0), max(int(np.floor(y0)), 0)
+    x1, y1 = min(int(np.ceil(x1)), widths[0] - 1), min(int(np.ceil(y1)), heights[0] - 1)
+
+    if x0 > x1 or y0 > y1 or np.isnan(zmin):
+        return False
+
+    # nível em que o retângulo ocupa no máximo MAX_CELLS células em cada direção
+    size = max(x1 - x0, y1 - y0) + 1
+    level = 0
+    while (size >> level) > MAX_CELLS and level < len(offsets) - 1:
+        level += 1
+
+    for cy in range(y0 >> level, (y1 >> level) + 1):
+        row = offsets[level] + cy * widths[level]
+        for cx in range(x0 >> level, (x1 >> level) + 1):
+            if data[row + cx] >= zmin:
+                return False
+
+    return True
+
+
+@numba.njit(cache = True)
+def _occluded_many(data, offsets, heights, widths, low, high) -> np.ndarray:
+
+    hidden = np.zeros(low.shape[0], dtype = np.bool_)
+
+    for i in range(low.shape[0]):
+        hidden[i] = _occluded(data, offsets, heights, widths,
+                              low[i, 0], low[i, 1], high[i, 0], high[i, 1], low[i, 2])
+
+    return hidden
+
+
+class HiZBuffer:
+
+    def __init__(self, depth_buffer):
+        """
+        Constrói a pirâmide de profundidade máxima.
+
+        Parametros
+        ----------
+        `depth_buffer`: array (altura, largura) com a profundidade de cada pixel (menor
+                        profundidade = mais próximo; pixels vazios com np.inf).
+        """
+
+        self.height, self.width = depth_buffer.shape
+        self.levels = [depth_buffer]
+
+        while self.levels[-1].shape[0] > 1 or self.levels[-1].shape[1] > 1:
+            self.levels.append(_downsample(self.levels[-1]))
+
+        # todos os níveis em um único array, para os testes compilados com numba
+        self.__data = np.concatenate([level.ravel() for level in self.levels]).astype(np.float64)
+        self.__offsets = np.cumsum([0] + [level.size for level in self.levels[:-1]]).astype(np.int64)
+        self.__heights = np.array([level.shape[0] for level in self.levels], dtype = np.int64)
+        self.__widths = np.array([level.shape[1] for level in self.levels], dtype = np.int64)
+
+    def occluded(self, x0, y0, x1, y1, zmin) -> bool:
+        """
+        Verifica se o retângulo [x0, x1] x [y0, y1] (em pixels) com menor profundidade
+        `zmin` está totalmente escondido. Retângulos fora da imagem não são considerados
+        escondidos (ficam para o descarte de triângulos fora da imagem).
+        """
+
+        return bool(_occluded(self.__data, self.__offsets, self.__heights, self.__widths,
+                              float(x0), float(y0), float(x1), float(y1), float(zmin)))
+
+    def occluded_many(self, low, high) -> np.ndarray:
+        """
+        Versão de `occluded` para vários retângulos.
+
+        Parametros
+        ----------
+        `low`: array (K, 3) com o menor x, y e profundidade de cada retângulo.
+        `high`: array (K, 3) com o maior x, y e profundidade de cada retângulo.
+
+        Retorna
+        --------
+        - array booleano (K,) indicando os retângulos escondidos
+        """
+
+        return _occluded_many(self.__data, self.__offsets, self.__heights, self.__widths,
+                              np.asarray(low, dtype = np.float64), np.asarray(high, dtype = np.float64))
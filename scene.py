@@ -4,21 +4,27 @@ Implementação da cena contendo um ou mais objetos
 A cena é composta de um array de objetos com suas coordenadas já
 transformadas para a cena: as transformações dos oobjetos retornam
 outros objetos com as dimensoes e posicionamentos modificados.
+
+Objetos também podem ser organizados em um grafo de cena (ver sceneGraph.py):
+nesse caso os vértices permanecem no sistema de coordenadas do próprio objeto
+e as transformações só são aplicadas quando a camera é adicionada à cena.
 """
 
 import os
 import numpy as np
 
 from camera import Camera
+from sceneGraph import SceneNode
 from sceneObject import save_obj
 from transformations import Transformer
 
 
 class Scene:
 
-    def __init__(self, objs: dict, camera = None):
+    def __init__(self, objs: dict, camera = None, root: SceneNode = None):
         self.__camera = camera # a cena terá apenas uma camera
         self.__objs = objs
+        self.__root = root if root is not None else SceneNode('cena')
 
     def add_camera(self, camera: Camera):
         """
@@ -30,8 +36,23 @@ class Scene:
 
         self.__camera = camera
 
-        for obj_alias, obj_info in self.__objs.items():
-            self.__camera.add_object(alias = obj_alias, obj_info = obj_info)
+        with self.__camera.get_stats().stage('scene.add_camera'):
+            for obj_alias, obj_info in self.__objs.items():
+                self.__add_to_camera(obj_alias, obj_info, None)
+
+            for node in self.__graph_objects():
+                self.__add_to_camera(node.name, node.obj_info, node.world_matrix)
+
+    def __add_to_camera(self, alias, obj_info, model_matrix):
+        """
+        Objetos lidos com sceneObject::read_npy (vértices em um array, normalmente em disco)
+        são rasterizados em blocos pela camera; os demais são transformados na adição.
+        """
+
+        if isinstance(obj_info['v'], np.ndarray):
+            self.__camera.add_stream(alias = alias, mesh = obj_info, model_matrix = model_matrix)
+        else:
+            self.__camera.add_object(alias = alias, obj_info = obj_info, model_matrix = model_matrix)
 
     def add_object(self, object_matrix: dict, alias: str):
         """
@@ -48,6 +69,40 @@ class Scene:
 
         self.__objs.pop(alias)
 
+    def add_node(self, node: SceneNode, parent: SceneNode = None):
+        """
+        Adiciona um nó (e toda a sua sub-árvore) ao grafo da cena, como filho de `parent`
+        ou da raiz da cena.
+        """
+
+        (parent if parent is not None else self.__root).add_child(node)
+
+    def remove_node(self, name: str):
+        """
+        Remove um nó (e toda a sua sub-árvore) do grafo da cena por meio do seu nome.
+        """
+
+        node = self.__root.find(name)
+
+        if node is None or node is self.__root:
+            raise ValueError(f'Nó \'{name}\' não encontrado na cena.')
+
+        node.parent.remove_child(node)
+
+    def get_root(self) -> SceneNode:
+        """
+        Encapsula a obtenção da raiz do grafo da cena.
+        """
+
+        return self.__root
+
+    def __graph_objects(self):
+        """
+        Nós do grafo da cena que possuem objetos.
+        """
+
+        return (node for node in self.__root.walk() if node.obj_info is not None)
+
     def to_obj(self):
         """
         Salva todos os objetos que estão no sistema de coordedadas da
@@ -59,4 +114,17 @@ class Scene:
             os.mkdir('scene_objects')
 
         for obj_alias, obj_info in self.__objs.items():
-            save_obj(filepath = f'scene_objects/scene_{obj_alias}.obj', obj_info = obj_info)
+            # objetos lidos com read_npy não são salvos (podem não caber na memória)
+            if not isinstance(obj_info['v'], np.ndarray):
+                save_obj(filepath = f'scene_objects/scene_{obj_alias}.obj', obj_info = obj_info)
+
+        # objetos do grafo são transformados para o sistema da cena apenas para serem salvos
+        for node in self.__graph_objects():
+            if isinstance(node.obj_info['v'], np.ndarray):
+                continue
+
+            obj_info = dict(node.obj_info)
+            obj_info['v'] = dict(enumerate(Transformer().apply(obj_matrix = node.obj_info['v'].values(),
+                                                               transf_matrix = node.world_matrix)))
+
+            save_obj(filepath = f'scene_objects/scene_{node.name}.obj', obj_info = obj_info)
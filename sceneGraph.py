@@ -0,0 +1,161 @@
+"""
+Grafo de cena hierárquico.
+
+Cada nó possui uma transformação local (em relação ao nó pai), uma lista de filhos e,
+opcionalmente, um objeto (dicionário sceneObject::obj_info com os vértices ainda no
+sistema de coordenadas do próprio objeto). A matriz de mundo de cada nó (produto das
+matrizes locais desde a raiz) é calculada sob demanda e mantida em cache.
+
+Alterar a transformação de um nó invalida apenas o cache da sua sub-árvore, e nenhum
+vértice é transformado: os vértices só são processados no momento da renderização,
+quando a camera aplica de uma só vez a matriz de mundo do nó e a sua própria matriz
+de troca de sistema de coordenadas (ver Scene.add_camera).
+
+Exemplo
+-------
+    chao = SceneNode('chao', obj_info = cubo.get_obj_info(), seq = [('scl', 3, 0.2, 3)])
+    escultura = SceneNode('escultura', obj_info = ..., seq = [...], parent = chao)
+
+    # move o chão e a escultura que está sobre ele
+    chao.set_transform([('scl', 3, 0.2, 3), ('mov', 1, 0, 0)])
+"""
+
+import numpy as np
+
+from transformations import Transformer
+
+
+class SceneNode:
+
+    def __init__(self, name: str, obj_info: dict = None, seq: list = None, parent = None):
+        """
+        Parametros
+        ----------
+        `name`: nome do nó (utilizado como alias do objeto na camera).
+        `obj_info`: dicionário com as informações sobre o objeto (ver sceneObject::read_obj).
+                    Nós sem objeto servem apenas para agrupar outros nós.
+        `seq`: sequencia de transformações locais no formato ('tipo', tx, ty, tz).
+        `parent`: nó pai (opcional).
+        """
+
+        self.name = name
+        self.obj_info = obj_info
+
+        self.__parent = None
+        self.__children = []
+
+        self.__local = Transformer().matrix(seq or [])
+        self.__world = None
+
+        if parent is not None:
+            parent.add_child(self)
+
+    @property
+    def parent(self):
+        return self.__parent
+
+    @property
+    def children(self) -> tuple:
+        return tuple(self.__children)
+
+    def add_child(self, node) -> None:
+        """
+        Adiciona um nó como filho (removendo-o do pai anterior, se houver).
+        """
+
+        ancestor = self
+        while ancestor is not None:
+            if ancestor is node:
+                raise ValueError(f'O nó \'{node.name}\' não pode ser filho de um de seus descendentes.')
+            ancestor = ancestor.parent
+
+        if node.__parent is not None:
+            node.__parent.__children.remove(node)
+
+        node.__parent = self
+        self.__children.append(node)
+        node.invalidate()
+
+    def remove_child(self, node) -> None:
+        """
+        Remove um nó filho (que passa a ser a raiz da sua própria sub-árvore).
+        """
+
+        self.__children.remove(node)
+        node.__parent = None
+        node.invalidate()
+
+    def set_transform(self, seq: list) -> None:
+        """
+        Substitui a transformação local do nó por uma sequencia de transformações.
+        """
+
+        self.set_matrix(Transformer().matrix(seq))
+
+    def set_matrix(self, matrix) -> None:
+        """
+        Substitui a transformação local do nó por uma matriz 4x4.
+        """
+
+        self.__local = np.asarray(matrix)
+        self.invalidate()
+
+    def get_matrix(self):
+        """
+        Encapsula a obtenção da matriz de transformação local.
+        """
+
+        return self.__local
+
+    def invalidate(self) -> None:
+        """
+        Descarta a matriz de mundo em cache do nó e da sua sub-árvore.
+
+        Um nó sem cache sempre tem todos os descendentes sem cache (a matriz de um filho só
+        é calculada depois da matriz do pai), então a invalidação para nos nós que já
+        estão sem cache.
+        """
+
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.__world is None:
+                continue
+            node.__world = None
+            stack.extend(node.__children)
+
+    @property
+    def world_matrix(self):
+        """
+        Matriz que leva os vértices do objeto do nó para o sistema de coordenadas da cena.
+        """
+
+        if self.__world is None:
+            if self.__parent is None:
+                self.__world = self.__local
+            else:
+                self.__world = np.matmul(self.__parent.world_matrix, self.__local)
+
+        return self.__world
+
+    def walk(self):
+        """
+        Percorre a sub-árvore do nó (incluindo o próprio nó) em profundidade.
+        """
+
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.__children))
+
+    def find(self, name: str):
+        """
+        Procura um nó pelo nome na sub-árvore (None caso não exista).
+        """
+
+        for node in self.walk():
+            if node.name == name:
+                return node
+
+        return None
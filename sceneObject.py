@@ -2,10 +2,16 @@
 Implmentação de um objeto da Cena.
 
 Implementa funções de carregamento e salvamento dos objetos no formato .obj
+
+Objetos maiores do que a memória disponível podem ser convertidos para arrays em
+disco (ver obj_to_npy) e lidos como np.memmap (ver read_npy), sem carregar o objeto
+inteiro na memória.
 """
 
+import os
 import numpy as np
 
+from collections.abc import Mapping
 from transformations import Transformer
 
 
@@ -55,6 +61,121 @@ def save_obj(filepath: str, obj_info: dict):
                     obj_file.write(f'{to_write}\n')
 
 
+def face_indices(faces) -> np.ndarray:
+    """
+    Índices (base 0) dos três primeiros vértices de cada face, como array (M, 3). Aceita
+    listas vazias e faces com quantidades diferentes de vértices (ex: triângulos e
+    quadriláteros lidos com read_obj, ou a lista de arrays de um SharedMesh).
+    """
+
+    if isinstance(faces, np.ndarray) and faces.ndim == 2:
+        return faces[:, :3].astype(np.int64) - 1
+
+    return np.array([face[:3] for face in faces], dtype = np.int64).reshape(-1, 3) - 1
+
+
+def save_npy(dirpath: str, obj_info: dict):
+    """
+    Salva os vértices e as faces (triângulos) de um objeto em arquivos .npy dentro da pasta
+    `dirpath` ('vertices.npy' e 'faces.npy', com índices base 0). Ver read_npy.
+    """
+
+    os.makedirs(dirpath, exist_ok = True)
+
+    np.save(os.path.join(dirpath, 'vertices.npy'),
+            np.array(list(obj_info['v'].values()), dtype = np.float32).reshape(-1, 3))
+    np.save(os.path.join(dirpath, 'faces.npy'), face_indices(obj_info['f']))
+
+
+def obj_to_npy(filepath: str, dirpath: str, chunk_size: int = 1 << 16):
+    """
+    Converte um arquivo .obj para o formato de save_npy sem carregar o objeto inteiro na
+    memória: as linhas são lidas e gravadas em blocos de `chunk_size`. Faces com mais de
+    três vértices são divididas em triângulos (em leque) e índices negativos (relativos)
+    são convertidos em absolutos.
+    """
+
+    os.makedirs(dirpath, exist_ok = True)
+
+    # primeira passada: apenas conta os vértices e triângulos para criar os arquivos
+    n_vertices = 0
+    n_faces = 0
+    with open(filepath, 'r') as obj_file:
+        for line in obj_file:
+            if line.startswith('v '):
+                n_vertices += 1
+            elif line.startswith('f '):
+                n_faces += len(line.split()) - 3
+
+    vertices = np.lib.format.open_memmap(os.path.join(dirpath, 'vertices.npy'), mode = 'w+',
+                                         dtype = np.float32, shape = (n_vertices, 3))
+    faces = np.lib.format.open_memmap(os.path.join(dirpath, 'faces.npy'), mode = 'w+',
+                                      dtype = np.int64, shape = (n_faces, 3))
+
+    v_block, f_block = [], []
+    v_count, f_count = 0, 0
+
+    def flush_vertices():
+        nonlocal v_block, v_count
+        if v_block:
+            vertices[v_count:v_count + len(v_block)] = v_block
+            v_count += len(v_block)
+            v_block = []
+
+    def flush_faces():
+        nonlocal f_block, f_count
+        if f_block:
+            faces[f_count:f_count + len(f_block)] = np.array(f_block) - 1
+            f_count += len(f_block)
+            f_block = []
+
+    with open(filepath, 'r') as obj_file:
+        for line in obj_file:
+            if line.startswith('v '):
+                v_block.append([float(value) for value in line.split()[1:4]])
+                if len(v_block) == chunk_size:
+                    flush_vertices()
+
+            elif line.startswith('f '):
+                # índices negativos são relativos ao último vértice lido antes da face
+                read = v_count + len(v_block)
+                face = [index if index > 0 else read + index + 1
+                        for index in (int(value.split('/')[0]) for value in line.split()[1:])]
+                for i in range(1, len(face) - 1):
+                    f_block.append((face[0], face[i], face[i + 1]))
+                if len(f_block) >= chunk_size:
+                    flush_faces()
+
+    flush_vertices()
+    flush_faces()
+
+    vertices.flush()
+    faces.flush()
+
+
+def read_npy(dirpath: str, mmap: bool = True) -> dict:
+    """
+    Le um objeto salvo com save_npy (ou obj_to_npy).
+
+    Parametros
+    ----------
+    `dirpath`: pasta com os arquivos 'vertices.npy' e 'faces.npy'.
+    `mmap`: se True os arrays são mapeados em memória (np.memmap, somente leitura) e os
+            dados só são lidos do disco quando acessados.
+
+    Retorna
+    --------
+    - dicionário {'v': array (N, 3), 'f': array (M, 3) com índices base 0} (ver Camera.add_stream)
+    """
+
+    mmap_mode = 'r' if mmap else None
+
+    return {
+        'v': np.load(os.path.join(dirpath, 'vertices.npy'), mmap_mode = mmap_mode),
+        'f': np.load(os.path.join(dirpath, 'faces.npy'), mmap_mode = mmap_mode),
+    }
+
+
 class sceneObject:
 
     def __init__(self, filepath = None, obj_info = None):
@@ -73,7 +194,7 @@ class sceneObject:
             self.__obj_info = read_obj(filepath)
 
         elif filepath == None and obj_info != None:
-            if isinstance(obj_info, dict):
+            if isinstance(obj_info, Mapping):
                 self.__obj_info = obj_info
             else:
                 raise ValueError(f'O atributo \'obj_info\' deve ser um dicionário. Foi passado: \'{type(obj_info)}\'.')
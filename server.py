@@ -0,0 +1,583 @@
+"""
+Servidor de renderização de longa duração.
+
+Evita que cada renderização pague o custo de iniciar o Python, importar numpy, numba e
+PIL e ler novamente os arquivos .obj: o servidor (asyncio) recebe descrições de cena e
+camera por HTTP (localhost ou socket Unix) e repassa a renderização, que é limitada por
+CPU, para um conjunto de processos. Os objetos já carregados ficam em um cache LRU
+limitado em memória, em memória compartilhada (ver meshstore.py): os processos de
+renderização acessam os objetos pelo nome do bloco, sem cópia. A leitura dos arquivos
+.obj também é feita nesses processos, que escrevem o objeto diretamente em um bloco
+compartilhado; o processo do servidor apenas registra o bloco no cache.
+
+Requisição (POST /render, corpo JSON):
+
+    {
+        "objects": {
+            "chao":      {"path": "./exemplos-3D/coarseTri.cube.obj", "transform": [["scl", 3, 0.2, 3]]},
+            "escultura": {"path": "./exemplos-3D/coarseTri.fertility.full.obj"}
+        },
+        "camera":   {"pos": [2, 2, 2], "look_at": [0, 0, 0]},
+        "snapshot": {"fov": 120, "aspect_ratio": 0.5, "near": 0, "far": 9},
+        "res":      [800, 600],
+        "format":   "png"
+    }
+
+A resposta é a imagem em PNG ("format": "png") ou o array RGB no formato .npy
+("format": "npy"). Os tempos e contadores da renderização (ver stats.py) são enviados
+no cabeçalho 'X-Render-Stats'. GET /health retorna o estado do servidor.
+
+Quando há mais requisições aguardando do que `max_pending` o servidor responde
+imediatamente com 503 (back-pressure) em vez de acumular trabalho. Caso um processo de
+renderização seja encerrado (ex: falta de memória) os processos são recriados e as
+requisições afetadas recebem 503; o estado dos processos aparece em GET /health.
+
+Utilização
+----------
+    python server.py --port 8765
+    python server.py --unix /tmp/render.sock
+
+    curl --unix-socket /tmp/render.sock -d @cena.json http://localhost/render -o imagem.png
+"""
+
+import io
+import os
+import json
+import math
+import signal
+import asyncio
+import argparse
+import concurrent.futures
+import numpy as np
+
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+
+from scene import Scene
+from camera import Camera
+from sceneObject import sceneObject, read_obj
+from meshstore import SharedMesh, SharedMeshStore, create_block
+
+
+MAX_BODY_SIZE = 1 << 20
+
+# maior largura/altura aceita para a imagem (os buffers de cor e profundidade ocupam 7
+# bytes por pixel em cada processo de renderização)
+MAX_RES = 4096
+
+# operações aceitas em 'transform' (ver transformations.py)
+TRANSFORMS = ('mov', 'rot', 'scl')
+
+STATUS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class MeshCache:
+
+    def __init__(self, max_bytes: int, store: SharedMeshStore):
+        """
+        Cache LRU de objetos carregados limitado pela memória ocupada. Os objetos ficam em
+        memória compartilhada no `store`; o cache mantém uma referência para cada objeto e
+        a libera quando o objeto é removido do cache.
+
+        Parametros
+        ----------
+        `max_bytes`: memória máxima ocupada pelos objetos do cache. Um objeto maior do que
+                     o limite é carregado mas não fica no cache.
+        `store`: SharedMeshStore onde os objetos são colocados.
+        """
+
+        self.max_bytes = max_bytes
+        self.store = store
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.__objs = OrderedDict()
+        # {chave: [lock, quantidade de requisições]} dos objetos sendo carregados
+        self.__loading = {}
+
+    async def get(self, filepath: str, load) -> SharedMesh:
+        """
+        Retorna o objeto do arquivo `filepath`, carregando do disco apenas se ele não
+        estiver no cache (ou se o arquivo tiver sido modificado). O objeto retornado tem
+        uma referência reservada para quem o pediu, que deve liberá-la com
+        `store.release` ao terminar de utilizá-lo.
+
+        Parametros
+        ----------
+        `filepath`: arquivo .obj do objeto.
+        `load`: corrotina load(filepath) que carrega o objeto no `store` (com uma
+                referência). Requisições simultâneas do mesmo arquivo aguardam uma única
+                leitura.
+        """
+
+        key = (os.path.abspath(filepath), os.path.getmtime(filepath))
+
+        entry = self.__loading.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+
+        try:
+            async with entry[0]:
+                return await self.__get(key, filepath, load)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.__loading[key]
+
+    async def __get(self, key, filepath, load) -> SharedMesh:
+
+        if key in self.__objs:
+            self.hits += 1
+            self.__objs.move_to_end(key)
+            return self.store.acquire(self.__objs[key])
+
+        self.misses += 1
+        mesh = await load(filepath)
+
+        if mesh.nbytes() <= self.max_bytes:
+            self.__objs[key] = self.store.acquire(mesh)
+            self.nbytes += mesh.nbytes()
+
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.__objs.popitem(last = False)
+                self.nbytes -= evicted.nbytes()
+                self.store.release(evicted)
+
+        return mesh
+
+    def clear(self) -> None:
+        """
+        Remove todos os objetos do cache.
+        """
+
+        while self.__objs:
+            self.store.release(self.__objs.popitem()[1])
+
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.__objs)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def load(filepath: str) -> tuple:
+    """
+    Le o arquivo .obj e escreve o objeto em um novo bloco de memória compartilhada.
+    Executado nos processos de renderização (a leitura não bloqueia o servidor).
+
+    Retorna
+    --------
+    - tupla (nome do bloco, layout dos arrays) para SharedMeshStore.adopt
+    """
+
+    shm, layout = create_block(read_obj(filepath))
+    shm.close()
+
+    return shm.name, layout
+
+
+def render(description: dict, meshes: dict) -> tuple:
+    """
+    Renderiza uma cena a partir da sua descrição (ver documentação do módulo).
+    Executado nos processos de renderização.
+
+    Parametros
+    ----------
+    `description`: descrição da cena.
+    `meshes`: dicionário {alias: SharedMesh} com os objetos já carregados.
+
+    Retorna
+    --------
+    - tupla (conteúdo da resposta, content-type, estatísticas da renderização)
+    """
+
+    objs = {}
+    for alias, info in description['objects'].items():
+        obj = sceneObject(obj_info = meshes[alias])
+
+        if info.get('transform'):
+            objs[alias] = obj.transform(seq = [list(t) for t in info['transform']])
+        else:
+            objs[alias] = obj.get_obj_info()
+
+    camera = Camera(**description['camera'])
+
+    scene = Scene(objs = objs)
+    scene.add_camera(camera)
+
+    camera.snapshot(**description['snapshot'])
+    camera.rasterize(res = tuple(description.get('res', (800, 600))))
+
+    buffer = io.BytesIO()
+
+    if description.get('format', 'png') == 'npy':
+        np.save(buffer, np.asarray(camera.get_image()))
+        content_type = 'application/octet-stream'
+    else:
+        camera.get_image().save(buffer, format = 'PNG')
+        content_type = 'image/png'
+
+    return buffer.getvalue(), content_type, camera.get_stats().as_dict()
+
+
+def validate(description) -> None:
+    """
+    Verifica a estrutura da descrição da cena antes de enviá-la para renderização.
+    """
+
+    if not isinstance(description, dict):
+        raise ValueError('A descrição da cena deve ser um objeto JSON.')
+
+    for key in ('objects', 'camera', 'snapshot'):
+        if key not in description:
+            raise ValueError(f'A descrição da cena deve conter \'{key}\'.')
+
+    if not isinstance(description['objects'], dict) or not description['objects']:
+        raise ValueError('\'objects\' deve ser um objeto JSON não vazio.')
+
+    for alias, info in description['objects'].items():
+        if not isinstance(info, dict) or not isinstance(info.get('path'), str) or not os.path.isfile(info['path']):
+            raise ValueError(f'Arquivo do objeto \'{alias}\' não encontrado.')
+
+        if set(info) - {'path', 'transform'}:
+            raise ValueError(f'Chaves desconhecidas no objeto \'{alias}\': {sorted(set(info) - {"path", "transform"})}.')
+
+        transform = info.get('transform') or []
+        if not isinstance(transform, list):
+            raise ValueError(f'\'transform\' do objeto \'{alias}\' deve ser uma lista.')
+
+        for step in transform:
+            if not isinstance(step, list) or len(step) != 4 or step[0] not in TRANSFORMS or not _is_vector(step[1:]):
+                raise ValueError(f'Transformação inválida no objeto \'{alias}\': {step!r} '
+                                 f'(formato: [{"|".join(TRANSFORMS)}, x, y, z]).')
+
+    camera = description['camera']
+    if not isinstance(camera, dict) or set(camera) != {'pos', 'look_at'}:
+        raise ValueError('\'camera\' deve conter apenas \'pos\' e \'look_at\'.')
+
+    for key in ('pos', 'look_at'):
+        if not _is_vector(camera[key]):
+            raise ValueError(f'\'camera.{key}\' deve ser uma lista com 3 números.')
+
+    if camera['pos'] == camera['look_at']:
+        raise ValueError('\'camera.pos\' e \'camera.look_at\' devem ser diferentes.')
+
+    snapshot = description['snapshot']
+    if not isinstance(snapshot, dict) or set(snapshot) != {'fov', 'aspect_ratio', 'near', 'far'}:
+        raise ValueError('\'snapshot\' deve conter apenas \'fov\', \'aspect_ratio\', \'near\' e \'far\'.')
+
+    if not _is_vector(list(snapshot.values()), size = 4):
+        raise ValueError('Os valores de \'snapshot\' devem ser números.')
+
+    if not (0 < snapshot['fov'] < 180 and snapshot['aspect_ratio'] > 0 and snapshot['far'] > snapshot['near']):
+        raise ValueError('\'snapshot\' deve ter 0 < fov < 180, aspect_ratio > 0 e far > near.')
+
+    res = description.get('res', [800, 600])
+    if (not isinstance(res, list) or len(res) != 2
+            or not all(isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= MAX_RES for value in res)):
+        raise ValueError(f'\'res\' deve ser uma lista com 2 inteiros entre 1 e {MAX_RES}.')
+
+    if description.get('format', 'png') not in ('png', 'npy'):
+        raise ValueError('\'format\' deve ser \'png\' ou \'npy\'.')
+
+    if set(description) - {'objects', 'camera', 'snapshot', 'res', 'format'}:
+        raise ValueError(f'Chaves desconhecidas na descrição da cena: '
+                         f'{sorted(set(description) - {"objects", "camera", "snapshot", "res", "format"})}.')
+
+
+def _is_vector(values, size = 3) -> bool:
+    return (isinstance(values, list) and len(values) == size
+            and all(isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+                    for value in values))
+
+
+class RenderServer:
+
+    def __init__(self, workers = None, cache_bytes = 512 << 20, max_concurrency = None, max_pending = None):
+        """
+        Parametros
+        ----------
+        `workers`: quantidade de processos de renderização (padrão: número de CPUs).
+        `cache_bytes`: memória máxima do cache de objetos.
+        `max_concurrency`: renderizações simultâneas (padrão: `workers`).
+        `max_pending`: requisições aceitas (em execução + aguardando) antes de responder
+                       com 503 (padrão: 4 * `max_concurrency`).
+        """
+
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_bytes = cache_bytes
+        self.max_concurrency = max_concurrency or self.workers
+        self.max_pending = max_pending or 4 * self.max_concurrency
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+        # 'ok', 'restarting' ou 'broken' (a última recriação dos processos falhou)
+        self.pool_state = 'ok'
+
+        self.__store = SharedMeshStore()
+        self.__cache = MeshCache(cache_bytes, self.__store)
+
+        self.__pool = None
+        self.__semaphore = None
+
+    async def start(self) -> None:
+        """
+        Cria os processos de renderização e aguarda que todos estejam prontos (com os
+        módulos já importados), para que a primeira requisição não pague esse custo.
+        """
+
+        self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.__pool = concurrent.futures.ProcessPoolExecutor(max_workers = self.workers)
+
+        await self.__warm_up(self.__pool)
+
+    async def __warm_up(self, pool) -> None:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(pool, _warm_up) for _ in range(self.workers)])
+
+    async def __submit(self, func, *args):
+        """
+        Executa `func` em um dos processos de renderização. Caso algum processo tenha
+        terminado de forma inesperada (ex: falta de memória) o ProcessPoolExecutor deixa de
+        aceitar tarefas: os processos são recriados e o erro é repassado para a requisição.
+        """
+
+        pool = self.__pool
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            await self.__restart(pool)
+            raise
+
+    async def __restart(self, broken) -> None:
+
+        # outra requisição já recriou os processos
+        if self.__pool is not broken:
+            return
+
+        self.__pool = concurrent.futures.ProcessPoolExecutor(max_workers = self.workers)
+        self.restarts += 1
+        self.pool_state = 'restarting'
+        broken.shutdown(wait = False, cancel_futures = True)
+
+        try:
+            await self.__warm_up(self.__pool)
+        except BrokenProcessPool:
+            self.pool_state = 'broken'
+            return
+
+        self.pool_state = 'ok'
+
+    def close(self) -> None:
+        if self.__pool is not None:
+            self.__pool.shutdown(wait = True, cancel_futures = True)
+            self.__pool = None
+
+        self.__cache.clear()
+        self.__store.close()
+
+    async def render(self, description: dict) -> tuple:
+        """
+        Agenda a renderização respeitando o limite de renderizações simultâneas. Os
+        objetos utilizados têm uma referência reservada até o fim da renderização, de
+        modo que não são removidos da memória compartilhada caso saiam do cache.
+        """
+
+        async with self.__semaphore:
+            meshes = {}
+
+            try:
+                for alias, info in description['objects'].items():
+                    meshes[alias] = await self.__cache.get(info['path'], self.__load)
+
+                content, content_type, stats = await self.__submit(render, description, meshes)
+            finally:
+                for mesh in meshes.values():
+                    self.__store.release(mesh)
+
+        stats['cache'] = self.cache_info()
+
+        return content, content_type, stats
+
+    async def __load(self, filepath: str) -> SharedMesh:
+        """
+        Le o objeto em um dos processos de renderização; no processo do servidor o bloco
+        criado é apenas registrado no store.
+        """
+
+        name, layout = await self.__submit(load, filepath)
+
+        return self.__store.adopt(name, layout)
+
+    def cache_info(self) -> dict:
+        return {'objects': len(self.__cache), 'bytes': self.__cache.nbytes,
+                'hits': self.__cache.hits, 'misses': self.__cache.misses}
+
+    async def handle(self, reader, writer) -> None:
+        """
+        Trata uma conexão (uma requisição HTTP/1.1 por conexão).
+        """
+
+        try:
+            status, headers, body = await self.__dispatch(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except (asyncio.LimitOverrunError, ValueError):
+            # linha do cabeçalho maior do que o limite do StreamReader (ou mal formada)
+            status, headers, body = self.__error(400, 'Requisição inválida.')
+
+        head = [f'HTTP/1.1 {status} {STATUS[status]}',
+                f'Content-Length: {len(body)}',
+                'Connection: close']
+        head += [f'{name}: {value}' for name, value in headers.items()]
+
+        try:
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def __dispatch(self, reader) -> tuple:
+
+        request_line = (await reader.readuntil(b'\r\n')).decode('latin-1').split()
+
+        headers = {}
+        while True:
+            line = (await reader.readuntil(b'\r\n')).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if len(request_line) != 3:
+            return self.__error(400, 'Requisição inválida.')
+
+        method, path, _ = request_line
+
+        if path == '/health':
+            return 200, {'Content-Type': 'application/json'}, json.dumps({
+                'workers': self.workers,
+                'pending': self.pending,
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'pool': self.pool_state,
+                'restarts': self.restarts,
+                'cache': self.cache_info(),
+            }).encode()
+
+        if path != '/render':
+            return self.__error(404, f'Caminho desconhecido: {path}')
+
+        if method != 'POST':
+            return self.__error(405, 'Utilize POST para /render.')
+
+        length = headers.get('content-length', '0')
+        if not length.isdigit():
+            return self.__error(400, 'Content-Length inválido.')
+
+        length = int(length)
+        if length > MAX_BODY_SIZE:
+            return self.__error(413, 'Descrição da cena muito grande.')
+
+        body = await reader.readexactly(length)
+
+        try:
+            description = json.loads(body)
+            validate(description)
+        except ValueError as error:
+            return self.__error(400, str(error))
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            status, headers, body = self.__error(503, 'Servidor ocupado.')
+            headers['Retry-After'] = '1'
+            return status, headers, body
+
+        self.pending += 1
+        try:
+            content, content_type, stats = await self.render(description)
+        except BrokenProcessPool:
+            status, headers, body = self.__error(503, 'Um processo de renderização foi encerrado; '
+                                                      'os processos foram recriados.')
+            headers['Retry-After'] = '1'
+            return status, headers, body
+        except Exception as error:
+            return self.__error(500, f'{type(error).__name__}: {error}')
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+
+        return 200, {'Content-Type': content_type, 'X-Render-Stats': json.dumps(stats)}, content
+
+    def __error(self, status, message) -> tuple:
+        return status, {'Content-Type': 'application/json'}, json.dumps({'error': message}).encode()
+
+
+async def serve(server: RenderServer, host = '127.0.0.1', port = 8765, unix = None) -> None:
+    """
+    Inicia o servidor e atende requisições até ser interrompido.
+    """
+
+    await server.start()
+
+    # SIGTERM encerra o servidor normalmente (removendo os blocos de memória compartilhada)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+    try:
+        if unix is not None:
+            listener = await asyncio.start_unix_server(server.handle, path = unix)
+        else:
+            listener = await asyncio.start_server(server.handle, host = host, port = port)
+
+        async with listener:
+            await listener.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        server.close()
+
+
+def main(argv = None) -> None:
+
+    parser = argparse.ArgumentParser(description = 'Servidor de renderização.')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8765)
+    parser.add_argument('--unix', help = 'caminho do socket Unix (substitui host/porta)')
+    parser.add_argument('--workers', type = int, default = None)
+    parser.add_argument('--cache-mb', type = int, default = 512)
+    parser.add_argument('--max-concurrency', type = int, default = None)
+    parser.add_argument('--max-pending', type = int, default = None)
+
+    args = parser.parse_args(argv)
+
+    server = RenderServer(workers = args.workers,
+                          cache_bytes = args.cache_mb << 20,
+                          max_concurrency = args.max_concurrency,
+                          max_pending = args.max_pending)
+
+    try:
+        asyncio.run(serve(server, host = args.host, port = args.port, unix = args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
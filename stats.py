@@ -0,0 +1,153 @@
+"""
+Instrumentação do pipeline de renderização.
+
+`RenderStats` acumula o tempo gasto em cada etapa (carregamento, troca de sistema de
+coordenadas, projeção, rasterização, ...) e contadores de trabalho realizado (vértices
+transformados, triângulos submetidos/descartados/escondidos/desenhados, pixels escritos).
+
+A medição é feita por etapa e não por vértice ou triângulo: cada etapa custa apenas duas
+leituras de relógio e uma entrada na lista de eventos, de modo que a instrumentação pode
+permanecer ativa. Os eventos podem ser exportados no formato de trace do Chrome
+(chrome://tracing ou https://ui.perfetto.dev).
+"""
+
+import os
+import json
+import time
+import threading
+
+from collections import deque
+from contextlib import contextmanager
+
+
+COUNTERS = [
+    'vertices_transformed',
+    'triangles_submitted',
+    'triangles_culled',
+    'triangles_occlusion_culled',
+    'triangles_drawn',
+    'pixels_written',
+]
+
+
+class RenderStats:
+
+    def __init__(self, enabled = True, max_events = 100000):
+        """
+        Parametros
+        ----------
+        `enabled`: se False nenhuma medição é feita (as chamadas viram operações vazias).
+        `max_events`: quantidade máxima de eventos mantidos para o trace (os mais antigos
+                      são descartados).
+        """
+
+        self.enabled = enabled
+        self.__events = deque(maxlen = max_events)
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Zera todos os tempos, contadores e eventos acumulados.
+        """
+
+        self.stages = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.__events.clear()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Mede o tempo do bloco `with` e acumula na etapa `name`.
+
+        Exemplo
+        -------
+            with stats.stage('rasterize.draw'):
+                ...
+        """
+
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = {'calls': 0, 'total': 0.0, 'min': elapsed, 'max': elapsed}
+
+            stage['calls'] += 1
+            stage['total'] += elapsed
+            stage['min'] = min(stage['min'], elapsed)
+            stage['max'] = max(stage['max'], elapsed)
+
+            self.__events.append((name, start, elapsed, threading.get_ident()))
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Incrementa o contador `name` (ver COUNTERS).
+        """
+
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self) -> dict:
+        """
+        Retorna os tempos por etapa e os contadores em um dicionário (serializável em JSON).
+        """
+
+        return {
+            'stages': {name: dict(stage) for name, stage in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+
+    def to_chrome_trace(self, filepath: str) -> None:
+        """
+        Salva os eventos medidos no formato de trace do Chrome (JSON).
+
+        Parametros
+        ----------
+        `filepath`: nome do arquivo a ser salvo.
+        """
+
+        pid = os.getpid()
+
+        events = [
+            {
+                'name': name,
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': elapsed * 1e6,
+                'pid': pid,
+                'tid': tid,
+            }
+            for name, start, elapsed, tid in self.__events
+        ]
+
+        if events:
+            events.append({
+                'name': 'counters',
+                'ph': 'C',
+                'ts': events[-1]['ts'] + events[-1]['dur'],
+                'pid': pid,
+                'args': dict(self.counters),
+            })
+
+        with open(filepath, 'w') as trace_file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
+
+    def __str__(self) -> str:
+
+        lines = [f'{"etapa":<28} {"chamadas":>8} {"total (ms)":>12} {"média (ms)":>12}']
+
+        for name, stage in self.stages.items():
+            lines.append(f'{name:<28} {stage["calls"]:>8} {stage["total"] * 1000:>12.2f} '
+                         f'{stage["total"] / stage["calls"] * 1000:>12.3f}')
+
+        for name, value in self.counters.items():
+            lines.append(f'{name:<28} {value:>8}')
+
+        return '\n'.join(lines)
@@ -41,22 +41,32 @@ class Transformer:
 
         vertices_to_transform = [vertex for index, vertex in obj_matrix.items()]
 
-        # obtem a primeira matrix de transformaão 4x4.
-        first_transf = seq.pop()
-        transf_matrix = self.__transf_methods[ first_transf[0] ](self.__identity,
-                                                                 first_transf[1], first_transf[2], first_transf[3])
-
-        # realiza as transformações em cadeia começando pela ultima e info para a primeira
-        for transf in reversed(seq):
-            transf_matrix = self.__transf_methods[ transf[0] ](transf_matrix, transf[1], transf[2], transf[3])
-
         # aplica a matriz resultante nas coordenadas dos vertices do objeto
-        transformed_vertices = self.apply(vertices_to_transform, transf_matrix)
+        transformed_vertices = self.apply(vertices_to_transform, self.matrix(seq))
 
         # retorna um dicionário no mesmo formato que foi fornecido como parâmetro da função
         return {index: vertex for index, vertex in enumerate(transformed_vertices)}
 
 
+    def matrix(self, seq: list):
+        """
+        Obtém a matriz de transformação 4x4 equivalente a uma sequencia de transformações
+        (a primeira transformação da sequencia é a primeira a ser aplicada nos vértices).
+
+        Retorna
+        --------
+        - matriz 4x4 (identidade caso a sequencia seja vazia)
+        """
+
+        transf_matrix = self.__identity
+
+        # realiza as transformações em cadeia começando pela ultima e indo para a primeira
+        for transf in reversed(seq):
+            transf_matrix = self.__transf_methods[ transf[0] ](transf_matrix, transf[1], transf[2], transf[3])
+
+        return transf_matrix
+
+
     def apply(self, obj_matrix, transf_matrix):
         """
         Aplica uma matrix de transformação a um objeto (conjunto de vértices)